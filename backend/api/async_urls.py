@@ -0,0 +1,28 @@
+from django.urls import path
+
+from .async_views import (
+    download_shopping_cart, ingredient_detail, ingredient_list,
+    recipe_detail, recipe_list, subscriptions, tag_detail, tag_list
+)
+
+# Маршруты стоят перед api.urls в foodgram_backend.asgi_urls
+# и перекрывают синхронные представления с теми же именами.
+urlpatterns = [
+    path("recipes/", recipe_list, name="recipes-list"),
+    path("recipes/<int:pk>/", recipe_detail, name="recipes-detail"),
+    path(
+        "recipes/download_shopping_cart/", download_shopping_cart,
+        name="recipes-download_shopping_cart",
+    ),
+    path("tags/", tag_list, name="tags-list"),
+    path("tags/<int:pk>/", tag_detail, name="tags-detail"),
+    path("ingredients/", ingredient_list, name="ingredients-list"),
+    path(
+        "ingredients/<int:pk>/", ingredient_detail,
+        name="ingredients-detail",
+    ),
+    path(
+        "users/subscriptions/", subscriptions,
+        name="users-subscriptions",
+    ),
+]
@@ -0,0 +1,249 @@
+"""
+Асинхронные варианты читающих эндпоинтов для запуска под ASGI.
+
+В Django 3.2 нет асинхронного ORM, поэтому запросы к базе выполняются
+в пуле потоков через sync_to_async(thread_sensitive=False), не занимая
+цикл событий. Независимые запросы, например страница и общее количество
+объектов, выполняются параллельно. Запросы на запись передаются
+синхронным представлениям без изменений.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.filters import RecipeFilter
+from api.paginations import PageLimitPagination
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipeListSerializer, SubscriptionListSerializer
+from api.shopping_cart import SHOPPING_LIST_FORMATS, get_shopping_list
+from api.views import (
+    IngredientViewSet, RecipeViewSet, SubscriptionsViewSet, TagViewSet
+)
+from foodgram.models import Recipe
+
+recipe_list_view = RecipeViewSet.as_view({"get": "list", "post": "create"})
+recipe_detail_view = RecipeViewSet.as_view({
+    "get": "retrieve",
+    "put": "update",
+    "patch": "partial_update",
+    "delete": "destroy",
+})
+
+
+def in_thread(func):
+    """
+    Асинхронная обертка, выполняющая func в пуле потоков.
+
+    Потоки пула живут дольше запроса, поэтому соединения с базой
+    закрываются так же, как в конце синхронного запроса.
+    """
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+def render(data, status=200, headers=None):
+    response = HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type="application/json",
+    )
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def async_api_view(view):
+    """
+    Превращает корутину в представление API: исключения DRF
+    становятся JSON-ответами с нужным кодом, CSRF не проверяется,
+    так как аутентификация идет по токену.
+    """
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except Http404:
+            exc = exceptions.NotFound()
+        except exceptions.APIException as error:
+            exc = error
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated,
+                            exceptions.AuthenticationFailed)):
+            headers["WWW-Authenticate"] = "Token"
+        detail = exc.detail
+        if not isinstance(detail, (list, dict)):
+            detail = {"detail": detail}
+        return render(detail, exc.status_code, headers)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+def offload(view):
+    """Асинхронное представление, выполняющее синхронное в пуле потоков."""
+    async def wrapper(request, *args, **kwargs):
+        return await in_thread(view)(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+async def authenticate(request):
+    """Оборачивает запрос в Request DRF и аутентифицирует пользователя."""
+    drf_request = Request(request, authenticators=[
+        authentication()
+        for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    await in_thread(getattr)(drf_request, "user")
+    return drf_request
+
+
+async def paginate(request, queryset, serialize):
+    """
+    Страница в формате PageLimitPagination.
+
+    Количество объектов и сама страница запрашиваются параллельно.
+    """
+    pagination = PageLimitPagination()
+    page_size = pagination.get_page_size(request)
+    try:
+        page = int(request.query_params.get(pagination.page_query_param, 1))
+    except ValueError:
+        page = 0
+    if page < 1:
+        raise exceptions.NotFound(pagination.invalid_page_message)
+    offset = (page - 1) * page_size
+
+    count, results = await asyncio.gather(
+        in_thread(queryset.count)(),
+        in_thread(
+            lambda: serialize(list(queryset[offset:offset + page_size]))
+        )(),
+    )
+    if page > 1 and offset >= count:
+        raise exceptions.NotFound(pagination.invalid_page_message)
+
+    url = request.build_absolute_uri()
+    next_url = previous_url = None
+    if offset + page_size < count:
+        next_url = replace_query_param(
+            url, pagination.page_query_param, page + 1
+        )
+    if page == 2:
+        previous_url = remove_query_param(url, pagination.page_query_param)
+    elif page > 2:
+        previous_url = replace_query_param(
+            url, pagination.page_query_param, page - 1
+        )
+    return {
+        "count": count,
+        "next": next_url,
+        "previous": previous_url,
+        "results": results,
+    }
+
+
+def filter_recipes(request):
+    filterset = RecipeFilter(
+        request.query_params,
+        queryset=Recipe.objects.order_by("-created_at", "-id"),
+        request=request,
+    )
+    if not filterset.is_valid():
+        raise exceptions.ValidationError(filterset.errors)
+    return filterset.qs
+
+
+@async_api_view
+async def recipe_list(request):
+    """Лента рецептов. Keyset-пагинация отдается синхронным путем."""
+    if request.method != "GET" or request.GET.get("pagination") == "cursor":
+        return await sync_to_async(recipe_list_view)(request)
+    request = await authenticate(request)
+    queryset = await in_thread(filter_recipes)(request)
+    return render(await paginate(
+        request,
+        queryset,
+        lambda recipes: RecipeListSerializer(
+            recipes, many=True, context={"request": request}
+        ).data,
+    ))
+
+
+@async_api_view
+async def recipe_detail(request, pk):
+    if request.method != "GET":
+        return await sync_to_async(recipe_detail_view)(request, pk=pk)
+    request = await authenticate(request)
+
+    def retrieve():
+        recipe = get_object_or_404(Recipe, pk=pk)
+        return RecipeListSerializer(
+            recipe, context={"request": request}
+        ).data
+
+    return render(await in_thread(retrieve)())
+
+
+@async_api_view
+async def subscriptions(request):
+    """Лента подписок текущего пользователя."""
+    request = await authenticate(request)
+    if not request.user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    recipes_limit = request.query_params.get("recipes_limit")
+
+    def serialize(page):
+        SubscriptionsViewSet().prefetch_recipes(page, recipes_limit)
+        return SubscriptionListSerializer(
+            page, many=True, context={"request": request}
+        ).data
+
+    return render(await paginate(
+        request,
+        request.user.subscriber.with_authors().order_by("id"),
+        serialize,
+    ))
+
+
+@async_api_view
+async def download_shopping_cart(request):
+    """
+    Список покупок. Под ASGI Django 3.2 перебирает потоковый ответ
+    в цикле событий, поэтому строки читаются из базы заранее в потоке.
+    """
+    request = await authenticate(request)
+    if not request.user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    file_format = request.query_params.get("file_format", "txt")
+    if file_format not in SHOPPING_LIST_FORMATS:
+        return render(
+            {"errors": f"Неизвестный формат файла: {file_format}"}, 400
+        )
+    content_type, render_list = SHOPPING_LIST_FORMATS[file_format]
+    rows = await in_thread(list)(get_shopping_list(request.user))
+    response = HttpResponse(
+        "".join(render_list(rows)), content_type=content_type
+    )
+    response[
+        "Content-Disposition"
+    ] = f"attachment; filename=shopping-list.{file_format}"
+    return response
+
+
+tag_list = offload(TagViewSet.as_view({"get": "list"}))
+tag_detail = offload(TagViewSet.as_view({"get": "retrieve"}))
+ingredient_list = offload(IngredientViewSet.as_view({"get": "list"}))
+ingredient_detail = offload(IngredientViewSet.as_view({"get": "retrieve"}))
@@ -0,0 +1,123 @@
+"""Аутентификация по токену с кешированием пользователя."""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from foodgram.models import User
+
+
+def cache_key(key):
+    """Ключ кеша по хешу токена, чтобы не хранить токены в открытом виде."""
+    return "auth:token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кеш процесса с ограниченным временем жизни."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self.lock:
+            self.items[key] = (value, time.monotonic() + self.ttl)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+local_cache = LRUCache(
+    settings.TOKEN_CACHE_LOCAL_SIZE, settings.TOKEN_CACHE_LOCAL_TTL
+)
+
+
+def get_shared_cache():
+    if settings.TOKEN_CACHE is None:
+        return None
+    return caches[settings.TOKEN_CACHE]
+
+
+def invalidate_token(key):
+    """Удаляет токен из обоих уровней кеша."""
+    name = cache_key(key)
+    local_cache.delete(name)
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(name)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication, который не ходит в базу за токеном на каждый
+    запрос.
+
+    Пара (пользователь, токен) ищется сначала в LRU-кеше процесса
+    (если он включен). В общем кеше TOKEN_CACHE (если задан) хранится
+    только id пользователя: кеш может лежать на диске или в общем
+    Redis, и хеш пароля и другие данные пользователя туда не попадают.
+    Пользователь тогда загружается из базы по первичному ключу.
+    Записи живут не дольше TTL и удаляются сигналами при удалении
+    токена (в том числе при выходе через djoser) и при изменении
+    пользователя. Каждый запрос получает свою копию пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        name = cache_key(key)
+        credentials = local_cache.get(name)
+        if credentials is None:
+            shared_cache = get_shared_cache()
+            user_id = None
+            if shared_cache is not None:
+                user_id = shared_cache.get(name)
+            if user_id is None:
+                credentials = super().authenticate_credentials(key)
+                if shared_cache is not None:
+                    shared_cache.set(
+                        name, credentials[0].pk, settings.TOKEN_CACHE_TIMEOUT
+                    )
+            else:
+                credentials = self.load_credentials(user_id, key)
+            local_cache.set(name, credentials)
+        user, token = credentials
+        return copy.copy(user), token
+
+    def load_credentials(self, user_id, key):
+        """Пользователь по id из общего кеша и токен без запроса к базе."""
+        user = User.objects.filter(pk=user_id, is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        return user, self.get_model()(key=key, user=user)
@@ -0,0 +1,121 @@
+"""
+Версионированный кеш справочных данных (теги, ингредиенты)
+и представлений рецептов.
+"""
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import (
+    parse_etags, patch_cache_control, patch_vary_headers
+)
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+from api.replicas import stick
+from foodgram.models import Recipe
+
+
+def version_key(model):
+    return f"reference:{model._meta.label_lower}:version"
+
+
+def get_version(model):
+    """
+    Возвращает текущую версию данных модели.
+
+    Версия - случайный токен, а не счетчик: если ключ версии будет
+    вытеснен из кеша, новая версия не совпадет ни с одной из старых.
+    """
+    key = version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(model):
+    """
+    Делает недействительными все закешированные данные модели.
+    Пока реплики догоняют основную базу, кеш заполняется из нее.
+    """
+    stick()
+    cache.set(version_key(model), uuid4().hex, timeout=None)
+
+
+def representation_keys(request, recipes):
+    """
+    Ключи кеша представлений рецептов.
+
+    В ключ входят версия данных, общих для многих рецептов (теги,
+    ингредиенты, авторы), адрес сайта, так как ссылки на изображения
+    абсолютные, и время изменения рецепта: измененный рецепт получает
+    новый ключ, а старая запись истекает сама.
+    """
+    prefix = hashlib.md5(
+        f"{get_version(Recipe)}:{request.build_absolute_uri('/')}".encode()
+    ).hexdigest()
+    return {
+        recipe.pk: (
+            f"recipe:{prefix}:{recipe.pk}:{recipe.updated_at.timestamp()}"
+        )
+        for recipe in recipes
+    }
+
+
+class ReferenceCacheMixin:
+    """
+    Миксин для ViewSet справочных данных.
+
+    Ответы list и retrieve хранятся в кеше готовыми байтами JSON
+    под ключом, включающим версию данных модели. Версия меняется
+    сигналами при сохранении и удалении объектов. Клиент получает
+    строгий ETag и при совпадении If-None-Match - ответ 304
+    без обращения к базе.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, render, request, *args, **kwargs):
+        # В кеше лежит JSON: другие форматы, например BrowsableAPI,
+        # строятся без кеша.
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return render(request, *args, **kwargs)
+        version = get_version(self.queryset.model)
+        digest = hashlib.md5(
+            f"{version}:{request.get_full_path()}".encode()
+        ).hexdigest()
+        etag = f'"{digest}"'
+        etags = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if etag in etags or "*" in etags:
+            response = HttpResponseNotModified()
+        else:
+            key = f"reference:{self.basename}:{digest}"
+            content = cache.get(key)
+            if content is None:
+                drf_response = render(request, *args, **kwargs)
+                if drf_response.status_code != 200:
+                    return drf_response
+                content = FastJSONRenderer().render(drf_response.data)
+                cache.set(key, content, settings.REFERENCE_CACHE_TIMEOUT)
+            response = HttpResponse(
+                content, content_type="application/json"
+            )
+        response["ETag"] = etag
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.REFERENCE_CACHE_MAX_AGE,
+            must_revalidate=True,
+        )
+        patch_vary_headers(response, ["Accept"])
+        return response
@@ -0,0 +1,123 @@
+"""
+Быстрые функции представления для читающих эндпоинтов.
+
+Функции строят те же словари, что и сериализаторы DRF, но напрямую
+из загруженных объектов, минуя механизм полей DRF. Включаются
+настройкой FAST_SERIALIZERS. Порядок ключей и типы значений должны
+совпадать с сериализаторами: это проверяет команда
+benchmark_serializers.
+"""
+from django.conf import settings
+from djoser.conf import settings as djoser_settings
+
+from foodgram.models import Recipe, User
+
+# Поля djoser.serializers.UserCreateSerializer, которым выводится автор.
+AUTHOR_FIELDS = (
+    *User.REQUIRED_FIELDS,
+    djoser_settings.LOGIN_FIELD,
+    djoser_settings.USER_ID_FIELD,
+)
+image_storage = Recipe._meta.get_field("image").storage
+
+
+def absolute_url(url, context):
+    request = context.get("request")
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def image(file, context):
+    if not file:
+        return None
+    return absolute_url(file.url, context)
+
+
+def renditions(paths, context):
+    return {
+        name: {
+            image_format: absolute_url(image_storage.url(path), context)
+            for image_format, path in formats.items()
+        }
+        for name, formats in paths.items()
+    }
+
+
+def tag(obj, context):
+    return {
+        "id": obj.id,
+        "name": obj.name,
+        "color": obj.color,
+        "slug": obj.slug,
+    }
+
+
+def ingredient(obj, context):
+    return {
+        "id": obj.id,
+        "name": obj.name,
+        "measurement_unit": obj.measurement_unit,
+    }
+
+
+def ingredient_amount(item, context):
+    return {
+        "id": item.ingredient.id,
+        "name": item.ingredient.name,
+        "measurement_unit": item.ingredient.measurement_unit,
+        "amount": item.amount,
+    }
+
+
+def author(user):
+    return {field: getattr(user, field) for field in AUTHOR_FIELDS}
+
+
+def recipe(obj, context):
+    """
+    Представление RecipeListSerializer. Флаги текущего пользователя
+    подставляет RecipeListSerializer.to_representations.
+    """
+    return {
+        "id": obj.id,
+        "author": author(obj.author),
+        "tags": [tag(item, context) for item in obj.tags.all()],
+        "ingredients": [
+            ingredient_amount(item, context)
+            for item in obj.ingredientrecipe_set.all()
+        ],
+        "name": obj.name,
+        "image": image(obj.image, context),
+        "renditions": renditions(obj.renditions, context),
+        "text": obj.text,
+        "cooking_time": obj.cooking_time,
+        "is_favorited": False,
+        "is_in_shopping_cart": False,
+    }
+
+
+def short_recipe(obj, context):
+    """Представление ShortInfoRecipeSerializer."""
+    return {
+        "id": obj.id,
+        "name": obj.name,
+        "image": image(obj.image, context),
+        "renditions": renditions(obj.renditions, context),
+        "cooking_time": obj.cooking_time,
+    }
+
+
+class FastPathMixin:
+    """
+    Миксин сериализатора только для чтения: при включенной настройке
+    FAST_SERIALIZERS to_representation вызывает функцию
+    fast_representation(instance, context) вместо полей DRF.
+    """
+
+    fast_representation = None
+
+    def to_representation(self, instance):
+        if settings.FAST_SERIALIZERS and self.fast_representation:
+            return self.fast_representation(instance, self.context)
+        return super().to_representation(instance)
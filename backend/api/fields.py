@@ -0,0 +1,73 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+def resolve_pks(queryset, pks):
+    """
+    Загружает объекты по списку id одним запросом in_bulk.
+
+    Возвращает объекты в порядке pks; если часть id не найдена,
+    сообщает обо всех таких id сразу.
+    """
+    try:
+        pks = [int(pk) for pk in pks]
+    except (TypeError, ValueError):
+        raise serializers.ValidationError(
+            "Идентификаторы должны быть целыми числами."
+        )
+    objects = queryset.in_bulk(pks)
+    missing = [pk for pk in dict.fromkeys(pks) if pk not in objects]
+    if missing:
+        raise serializers.ValidationError(
+            "Объекты с id {} не найдены.".format(
+                ", ".join(map(str, missing))
+            )
+        )
+    return [objects[pk] for pk in pks]
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список связанных объектов, проверяемый одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+        return resolve_pks(self.child_relation.get_queryset(), data)
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField, который с many=True проверяет все id
+    одним запросом вместо запроса на каждый элемент.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class RenditionsField(serializers.ReadOnlyField):
+    """
+    Ссылки на уменьшенные копии изображения рецепта.
+
+    Пока копии не готовы, возвращает пустой словарь.
+    """
+
+    def to_representation(self, renditions):
+        storage = self.parent.Meta.model._meta.get_field("image").storage
+        request = self.context.get("request")
+        result = {}
+        for name, paths in renditions.items():
+            result[name] = {}
+            for image_format, path in paths.items():
+                url = storage.url(path)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                result[name][image_format] = url
+        return result
@@ -1,14 +1,44 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+from django.db.models.functions import Lower
 from django_filters import ModelMultipleChoiceFilter
 from django_filters.rest_framework import FilterSet, filters
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
 
+from api.ingredient_index import get_index
 from foodgram.models import Recipe, Tag, User
+from foodgram.search import SEARCH_CONFIG, supports_full_text
+
+
+class IngredientSearchFilter(BaseFilterBackend):
+    """
+    Поиск ингредиентов по началу названия.
+
+    Список отдается из индекса в памяти процесса без обращения к базе.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        name = request.query_params.get(api_settings.SEARCH_PARAM)
+        if not name or view.action != "list":
+            return queryset
+        return get_index().search(name)
 
 
 class RecipeFilter(FilterSet):
     """
     Фильтр для рецептов.
-    Позволяет фильтровать рецепты по тегам, автору и наличию в избранном.
+    Позволяет фильтровать рецепты по тегам, автору и наличию в избранном,
+    искать по названию и описанию (search), а также сортировать их
+    по популярности (ordering=popular) и по набирающим популярность
+    (ordering=trending).
     """
+
+    ORDERING_FIELDS = {
+        "popular": "score__popularity",
+        "trending": "score__trending",
+    }
+
     is_favorited = filters.BooleanFilter(method="filter_is_favorited")
     is_in_shopping_cart = filters.BooleanFilter(
         method="filter_is_in_shopping_cart"
@@ -18,8 +48,23 @@ class RecipeFilter(FilterSet):
         field_name="tags__slug",
         to_field_name="slug",
         queryset=Tag.objects.all(),
+        method="filter_tags",
+    )
+    search = filters.CharFilter(method="filter_search")
+    ordering = filters.ChoiceFilter(
+        choices=(("popular", "popular"), ("trending", "trending")),
+        method="filter_ordering",
     )
 
+    def filter_tags(self, queryset, name, value):
+        """
+        Метод для фильтрации рецептов с любым из выбранных тегов
+        по битовой маске tags_mask.
+        """
+        if not value:
+            return queryset
+        return queryset.with_any_tags([tag.pk for tag in value])
+
     def filter_is_favorited(self, queryset, name, value):
         """
         Метод для фильтрации рецептов по избранному.
@@ -36,6 +81,42 @@ class RecipeFilter(FilterSet):
             return queryset.filter(cart_recipe__user=self.request.user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        """
+        Метод полнотекстового поиска с сортировкой по релевантности.
+        Без PostgreSQL ищет вхождение подстроки в названии и описании
+        без учета регистра, в том числе кириллицы.
+        """
+        if not supports_full_text(queryset):
+            value = value.lower()
+            return queryset.alias(
+                search_name=Lower("name"), search_text=Lower("text")
+            ).filter(
+                Q(search_name__contains=value) | Q(search_text__contains=value)
+            )
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_at", "-id")
+        )
+
+    def filter_ordering(self, queryset, name, value):
+        """
+        Метод сортировки по материализованным оценкам рецептов.
+        Рецепты без оценки идут в конце.
+        """
+        return queryset.order_by(
+            F(self.ORDERING_FIELDS[value]).desc(nulls_last=True),
+            "-created_at",
+            "-id",
+        )
+
     class Meta:
         model = Recipe
-        fields = ("author", "tags", "is_favorited", "is_in_shopping_cart")
+        fields = (
+            "author", "tags", "is_favorited", "is_in_shopping_cart",
+            "search", "ordering",
+        )
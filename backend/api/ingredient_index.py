@@ -0,0 +1,83 @@
+"""Префиксный индекс ингредиентов в памяти процесса."""
+import bisect
+from threading import Lock
+
+from api.caching import get_version
+from foodgram.models import Ingredient
+
+_index = None
+_index_version = None
+_lock = Lock()
+
+
+def normalize(value):
+    """Приводит строку к виду для поиска без учета регистра и буквы ё."""
+    return value.strip().casefold().replace("ё", "е")
+
+
+class IngredientIndex:
+    """
+    Неизменяемый префиксный индекс ингредиентов.
+
+    Нормализованные названия хранятся в отсортированном кортеже,
+    поэтому все названия с заданным префиксом занимают непрерывный
+    отрезок, границы которого находятся двоичным поиском.
+    """
+
+    __slots__ = ("_keys", "_rows")
+
+    def __init__(self, rows):
+        entries = sorted(
+            (normalize(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit in rows
+        )
+        self._keys = tuple(entry[0] for entry in entries)
+        self._rows = tuple(entry[1:] for entry in entries)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def search(self, prefix):
+        """
+        Возвращает ингредиенты, название которых начинается с prefix.
+
+        Сначала идет точное совпадение, затем более короткие названия.
+        """
+        prefix = normalize(prefix)
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_right(self._keys, prefix + chr(0x10FFFF), start)
+        positions = sorted(
+            range(start, end),
+            key=lambda position: (
+                self._keys[position] != prefix,
+                len(self._keys[position]),
+                self._keys[position],
+            ),
+        )
+        return [
+            Ingredient(id=pk, name=name, measurement_unit=measurement_unit)
+            for pk, name, measurement_unit in (
+                self._rows[position] for position in positions
+            )
+        ]
+
+
+def get_index():
+    """
+    Возвращает индекс, загружая его из базы при первом обращении.
+
+    Индекс перестраивается, когда меняется версия справочника
+    ингредиентов, поэтому изменения видны во всех процессах.
+    """
+    global _index, _index_version
+    version = get_version(Ingredient)
+    if _index_version != version:
+        with _lock:
+            if _index_version != version:
+                _index = IngredientIndex(
+                    Ingredient.objects.values_list(
+                        "id", "name", "measurement_unit"
+                    )
+                )
+                _index_version = version
+    return _index
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+from api.authentication import CachedTokenAuthentication, invalidate_token
+from foodgram.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение TokenAuthentication и CachedTokenAuthentication "
+        "по числу запросов к БД и времени аутентификации"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    def measure(self, authentication, key, iterations):
+        factory = RequestFactory()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                request = Request(
+                    factory.get("/", HTTP_AUTHORIZATION=f"Token {key}")
+                )
+                authentication.authenticate(request)
+            elapsed = time.perf_counter() - started
+        return len(context) / iterations, elapsed / iterations * 10 ** 6
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by("pk").first()
+        if user is None:
+            raise CommandError("Нет пользователей.")
+        token, _ = Token.objects.get_or_create(user=user)
+        invalidate_token(token.key)
+        for authentication in (
+            TokenAuthentication(), CachedTokenAuthentication()
+        ):
+            queries, microseconds = self.measure(
+                authentication, token.key, options["iterations"]
+            )
+            self.stdout.write(
+                f"{type(authentication).__name__:<28}"
+                f"запросов на вызов: {queries:.3f}, "
+                f"время: {microseconds:.1f} мкс"
+            )
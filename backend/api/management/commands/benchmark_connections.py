@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgresDatabaseWrapper
+)
+
+from foodgram_backend.postgresql.base import (
+    DatabaseWrapper as PooledDatabaseWrapper
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение времени установки соединения с PostgreSQL на запрос "
+        "без пула и с пулом foodgram_backend.postgresql"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def measure(self, wrapper, iterations):
+        """
+        Повторяет жизненный цикл запроса с CONN_MAX_AGE=0: соединение,
+        один запрос, закрытие в конце запроса.
+        """
+        connect_time = total_time = 0.0
+        for _ in range(iterations):
+            started = time.perf_counter()
+            wrapper.ensure_connection()
+            connected = time.perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            wrapper.close_if_unusable_or_obsolete()
+            finished = time.perf_counter()
+            connect_time += connected - started
+            total_time += finished - started
+        wrapper.close()
+        return (
+            connect_time / iterations * 1000,
+            total_time / iterations * 1000,
+        )
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        if connections[alias].vendor != "postgresql":
+            raise CommandError("Команда работает только с PostgreSQL.")
+        settings_dict = dict(connections[alias].settings_dict)
+        settings_dict["CONN_MAX_AGE"] = 0
+        settings_dict["POOL"] = {
+            **settings_dict.get("POOL", {}),
+            "SIZE": max(settings_dict.get("POOL", {}).get("SIZE", 1), 1),
+        }
+        results = []
+        for name, wrapper_class in (
+            ("без пула", PostgresDatabaseWrapper),
+            ("с пулом", PooledDatabaseWrapper),
+        ):
+            connect_ms, total_ms = self.measure(
+                wrapper_class(settings_dict, alias), options["iterations"]
+            )
+            results.append(connect_ms)
+            self.stdout.write(
+                f"{name:<10}соединение: {connect_ms:.3f} мс, "
+                f"запрос целиком: {total_ms:.3f} мс"
+            )
+        self.stdout.write(
+            f"Экономия на запрос: {results[0] - results[1]:.3f} мс"
+        )
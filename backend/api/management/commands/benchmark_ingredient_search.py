@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.ingredient_index import IngredientIndex, normalize
+from foodgram.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение поиска ингредиентов по префиксу через IngredientIndex "
+        "и прежним запросом SearchFilter (name ILIKE 'x%')"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--samples", type=int, default=50,
+            help="Сколько названий взять для построения префиксов.",
+        )
+
+    def get_prefixes(self, names, samples):
+        """Префиксы длиной 1-3 символа, как при наборе в форме рецепта."""
+        step = max(len(names) // samples, 1)
+        return sorted({
+            normalize(name)[:length]
+            for name in names[::step]
+            for length in (1, 2, 3)
+        })
+
+    def measure(self, search, prefixes, iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for prefix in prefixes:
+                    search(prefix)
+            elapsed = time.perf_counter() - started
+        lookups = len(prefixes) * iterations
+        return len(context) / lookups, elapsed / lookups * 10 ** 6
+
+    def handle(self, *args, **options):
+        rows = list(
+            Ingredient.objects.order_by("pk").values_list(
+                "id", "name", "measurement_unit"
+            )
+        )
+        if not rows:
+            raise CommandError(
+                "Нет ингредиентов: запустите load_ingredients_data."
+            )
+        prefixes = self.get_prefixes(
+            [name for _, name, _ in rows], options["samples"]
+        )
+        started = time.perf_counter()
+        index = IngredientIndex(rows)
+        build_ms = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f"Ингредиентов: {len(index)}, префиксов: {len(prefixes)}, "
+            f"построение индекса: {build_ms:.1f} мс"
+        )
+        for name, search in (
+            ("ILIKE", lambda prefix: list(
+                Ingredient.objects.filter(name__istartswith=prefix)
+            )),
+            ("IngredientIndex", index.search),
+        ):
+            queries, microseconds = self.measure(
+                search, prefixes, options["iterations"]
+            )
+            self.stdout.write(
+                f"{name:<18}запросов на поиск: {queries:.3f}, "
+                f"время: {microseconds:.1f} мкс"
+            )
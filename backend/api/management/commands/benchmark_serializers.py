@@ -0,0 +1,103 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api import fast_serializers
+from api.renderers import FastJSONRenderer
+from api.serializers import (
+    IngredientSerializer, RecipeListSerializer,
+    ShortInfoRecipeSerializer, TagSerializer
+)
+from foodgram.models import Ingredient, Recipe, Tag, recipe_prefetches
+
+# Флаги пользователя в быстром представлении рецепта подставляются
+# позже, в RecipeListSerializer.to_representations.
+USER_FLAGS = ("is_favorited", "is_in_shopping_cart")
+
+
+def without_flags(data):
+    return {key: value for key, value in data.items() if key not in USER_FLAGS}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение сериализаторов DRF с быстрыми функциями представления "
+        "и JSONRenderer с FastJSONRenderer: объектов в секунду и "
+        "совпадение вывода"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=200)
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def measure(self, func, items, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for item in items:
+                func(item)
+        return len(items) * iterations / (time.perf_counter() - started)
+
+    def report(self, name, slow, fast):
+        self.stdout.write(
+            f"{name:<24}{slow:>12.0f}{fast:>12.0f}{fast / slow:>9.1f}x"
+        )
+
+    def handle(self, *args, **options):
+        limit = options["objects"]
+        iterations = options["iterations"]
+        recipes = list(
+            Recipe.objects.select_related("author")
+            .prefetch_related(*recipe_prefetches())
+            .order_by("-id")[:limit]
+        )
+        if not recipes:
+            raise CommandError("Нет рецептов: запустите generate_dataset.")
+        context = {"request": Request(RequestFactory().get("/"))}
+        cases = (
+            ("tags", TagSerializer, fast_serializers.tag,
+             list(Tag.objects.all()[:limit])),
+            ("ingredients", IngredientSerializer, fast_serializers.ingredient,
+             list(Ingredient.objects.all()[:limit])),
+            ("recipes", RecipeListSerializer, fast_serializers.recipe,
+             recipes),
+            ("short_recipes", ShortInfoRecipeSerializer,
+             fast_serializers.short_recipe, recipes),
+        )
+
+        self.stdout.write(
+            f"{'объекты/сек':<24}{'DRF':>12}{'fast':>12}{'':>10}"
+        )
+        documents = []
+        for name, serializer_class, fast, items in cases:
+            serializer = serializer_class(context=context)
+
+            def slow(instance):
+                return serializers.ModelSerializer.to_representation(
+                    serializer, instance
+                )
+
+            expected = [without_flags(slow(item)) for item in items]
+            if expected != [without_flags(fast(item, context))
+                            for item in items]:
+                raise CommandError(f"{name}: представления различаются.")
+            documents.append(expected)
+            self.report(
+                name,
+                self.measure(slow, items, iterations),
+                self.measure(lambda item: fast(item, context), items,
+                             iterations),
+            )
+
+        if JSONRenderer().render(documents) != FastJSONRenderer().render(
+            documents
+        ):
+            raise CommandError("Вывод рендереров различается.")
+        self.report(
+            "render",
+            self.measure(JSONRenderer().render, documents, iterations),
+            self.measure(FastJSONRenderer().render, documents, iterations),
+        )
@@ -0,0 +1,225 @@
+import itertools
+import json
+import re
+from contextlib import ExitStack
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.caching import bump_version
+from api.management.commands.run_benchmarks import (
+    Command as BenchmarkCommand
+)
+from api.membership import invalidate
+from foodgram.models import Cart, Favorite, Ingredient, Recipe, Tag
+
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+# Полный просмотр, отбрасывающий большую часть строк, мог бы
+# использовать индекс. Возвращающий почти всю таблицу - нет.
+MAX_SELECTIVITY = 0.1
+# Справочник ингредиентов намеренно читается целиком: список отдается
+# без пагинации, а префиксный индекс загружается в память процесса.
+IGNORED_TABLES = ("foodgram_ingredient",)
+
+
+class QueryCollector:
+    """Обертка выполнения, собирающая различные SELECT с параметрами."""
+
+    def __init__(self):
+        self.queries = {}
+        self.url = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            alias = context["connection"].alias
+            query = self.queries.setdefault((alias, sql), {
+                "database": alias,
+                "sql": sql,
+                "params": params,
+                "urls": [],
+            })
+            if self.url not in query["urls"]:
+                query["urls"].append(self.url)
+        return execute(sql, params, many, context)
+
+
+def iter_plan_nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from iter_plan_nodes(child)
+
+
+class Command(BenchmarkCommand):
+    help = (
+        "Планы выполнения (EXPLAIN ANALYZE) всех запросов к БД "
+        "эндпоинтов API и комбинаций фильтров рецептов; полные "
+        "просмотры больших таблиц считаются ошибкой"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Email пользователя, от имени которого идут запросы. "
+                 "По умолчанию пользователь с наибольшим числом подписок.",
+        )
+        parser.add_argument(
+            "--min-rows", type=int, default=1000,
+            help="Полный просмотр таблицы меньшего размера не считается "
+                 "ошибкой.",
+        )
+        parser.add_argument(
+            "--ignore-table", action="append", default=[],
+            help="Таблица, полный просмотр которой ожидаем, "
+                 "в дополнение к foodgram_ingredient.",
+        )
+        parser.add_argument(
+            "--output", help="Файл для сохранения планов в JSON."
+        )
+
+    def get_filter_scenarios(self):
+        """Все комбинации фильтров ленты рецептов."""
+        recipe = Recipe.objects.order_by("-pk").first()
+        slugs = list(
+            Tag.objects.order_by("pk").values_list("slug", flat=True)[:2]
+        )
+        options = {
+            "author": [recipe.author_id] if recipe else [],
+            "tags": [slugs[:1], slugs] if slugs else [],
+            "is_favorited": [1],
+            "is_in_shopping_cart": [1],
+            "search": [recipe.name.split()[-1]] if recipe else [],
+            "ordering": ["popular", "trending"],
+        }
+        for values in itertools.product(
+            *([None, *choices] for choices in options.values())
+        ):
+            query = urlencode(
+                [
+                    (name, value)
+                    for name, value in zip(options, values)
+                    if value is not None
+                ],
+                doseq=True,
+            )
+            if query:
+                yield f"recipes-list?{query}", f"/api/recipes/?{query}"
+
+    def collect(self, user, token):
+        collector = QueryCollector()
+        client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+        scenarios = itertools.chain(
+            self.get_scenarios(self.get_samples(user)),
+            self.get_filter_scenarios(),
+        )
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        # Версии сбрасываются в своих кешах процесса, а не в кешах
+        # работающего сайта.
+        throwaway = {
+            alias: {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": f"explain_queries:{alias}",
+            }
+            for alias in settings.CACHES
+        }
+        with override_settings(
+            ALLOWED_HOSTS=hosts, CACHES=throwaway
+        ), ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            for name, url in scenarios:
+                # Без кешей запросы доходят до базы.
+                for model in (Tag, Ingredient, Recipe):
+                    bump_version(model)
+                for model in (Favorite, Cart):
+                    invalidate(user.pk, model)
+                collector.url = url
+                response = client.get(url)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+        return list(collector.queries.values())
+
+    def explain(self, query):
+        connection = connections[query["database"]]
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query["sql"],
+                    query["params"],
+                )
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                scans = [
+                    node["Relation Name"]
+                    for node in iter_plan_nodes(plan[0]["Plan"])
+                    if node["Node Type"] == "Seq Scan"
+                    and node.get("Rows Removed by Filter", 0) * MAX_SELECTIVITY
+                    > node["Actual Rows"]
+                ]
+                return plan, scans
+            if connection.vendor == "sqlite":
+                cursor.execute(
+                    "EXPLAIN QUERY PLAN " + query["sql"], query["params"]
+                )
+                plan = [row[-1] for row in cursor.fetchall()]
+                # Просмотры подзапросов и CTE тоже выглядят как SCAN.
+                tables = set(connection.introspection.table_names(cursor))
+                scans = [
+                    match[1] for match in map(SQLITE_FULL_SCAN.match, plan)
+                    if match and match[1] in tables
+                ]
+                return plan, scans
+        raise CommandError(
+            f"EXPLAIN для {connection.vendor} не поддерживается."
+        )
+
+    def count_rows(self, database, table, counts):
+        if (database, table) not in counts:
+            connection = connections[database]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}"
+                )
+                counts[database, table] = cursor.fetchone()[0]
+        return counts[database, table]
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["user"])
+        token, _ = Token.objects.get_or_create(user=user)
+        queries = self.collect(user, token)
+
+        ignored = {*IGNORED_TABLES, *options["ignore_table"]}
+        counts = {}
+        problems = []
+        for query in queries:
+            query["plan"], scans = self.explain(query)
+            query["seq_scans"] = [
+                {
+                    "table": table,
+                    "rows": self.count_rows(query["database"], table, counts),
+                }
+                for table in dict.fromkeys(scans)
+                if table not in ignored
+            ]
+            query["params"] = [str(param) for param in query["params"] or ()]
+            for scan in query["seq_scans"]:
+                if scan["rows"] >= options["min_rows"]:
+                    problems.append(
+                        f"{scan['table']} ({scan['rows']} строк), "
+                        f"{query['urls'][0]}:\n    {query['sql'][:300]}"
+                    )
+
+        self.stdout.write(f"Проверено запросов: {len(queries)}")
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(queries, file, ensure_ascii=False, indent=2)
+        if problems:
+            raise CommandError(
+                "Полный просмотр больших таблиц:\n" + "\n".join(problems)
+            )
+        self.stdout.write(self.style.SUCCESS("Полных просмотров нет."))
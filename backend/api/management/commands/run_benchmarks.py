@@ -0,0 +1,284 @@
+import json
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.authtoken.models import Token
+
+from foodgram.models import Ingredient, Recipe, Tag, User
+
+# Дополнительные сценарии для маршрутов с фильтрами и параметрами.
+SCENARIOS = {
+    "recipes-list": [
+        "",
+        "?limit=6",
+        "?tags=breakfast&tags=lunch",
+        "?is_favorited=1",
+        "?is_in_shopping_cart=1",
+        "?pagination=cursor",
+        "?ordering=popular",
+        "?ordering=trending",
+        "?search=рецепт",
+    ],
+    "users-subscriptions": ["", "?recipes_limit=3"],
+    "ingredients-list": ["", "?name=мол"],
+}
+
+
+def iter_patterns(patterns):
+    """Обходит все маршруты, раскрывая вложенные include()."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+
+
+def allows_get(callback):
+    """Проверяет, отвечает ли представление на GET."""
+    actions = getattr(callback, "actions", None)
+    if actions is not None:
+        return "get" in actions
+    view_class = getattr(callback, "cls", None)
+    if view_class is not None:
+        return hasattr(view_class, "get")
+    return True
+
+
+def percentile(values, percent):
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+
+def summarize(url, status, timings, queries, elapsed):
+    return {
+        "url": url,
+        "status": status,
+        "p50": round(percentile(timings, 50), 2),
+        "p95": round(percentile(timings, 95), 2),
+        "p99": round(percentile(timings, 99), 2),
+        "rps": round(len(timings) / elapsed, 1),
+        "queries": queries,
+    }
+
+
+class LiveClient:
+    """
+    Клиент для замеров запущенного сервера (gunicorn, uvicorn) с
+    несколькими параллельными потоками. Число запросов к базе берется
+    из заголовка Server-Timing.
+    """
+
+    queries_pattern = re.compile(r'desc="(\d+) queries"')
+
+    def __init__(self, base_url, token, concurrency):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Token {token}"}
+        self.concurrency = concurrency
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url):
+        started = time.perf_counter()
+        response = self.session.get(self.base_url + url, headers=self.headers)
+        elapsed = (time.perf_counter() - started) * 1000
+        match = self.queries_pattern.search(
+            response.headers.get("Server-Timing", "")
+        )
+        return response.status_code, elapsed, int(match[1]) if match else 0
+
+    def measure(self, url, iterations, warmup):
+        for _ in range(warmup):
+            self.get(url)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            results = list(executor.map(self.get, [url] * iterations))
+        elapsed = time.perf_counter() - started
+        return summarize(
+            url,
+            results[-1][0],
+            [timing for _, timing, _ in results],
+            max(queries for _, _, queries in results),
+            elapsed,
+        )
+
+
+class Command(BaseCommand):
+    help = "Замер задержек и числа запросов к БД для маршрутов API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Email пользователя, от имени которого идут запросы. "
+                 "По умолчанию пользователь с наибольшим числом подписок.",
+        )
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--base-url",
+            help="Адрес запущенного сервера, например http://127.0.0.1:8000. "
+                 "Без него запросы идут через тестовый клиент Django.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=1,
+            help="Число параллельных клиентов при замере сервера.",
+        )
+        parser.add_argument(
+            "--output", help="Файл для сохранения результатов в JSON."
+        )
+        parser.add_argument(
+            "--baseline", help="JSON с эталонными результатами."
+        )
+        parser.add_argument(
+            "--tolerance", type=float, default=0.2,
+            help="Допустимый относительный рост p95.",
+        )
+        parser.add_argument(
+            "--min-delta-ms", type=float, default=5.0,
+            help="Рост p95 меньше этого значения не считается регрессией.",
+        )
+
+    def get_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+        else:
+            user = (
+                User.objects.annotate(subscriptions=Count("subscriber"))
+                .order_by("-subscriptions", "pk").first()
+            )
+        if user is None:
+            raise CommandError(
+                "Нет пользователей. Сначала выполните generate_dataset."
+            )
+        return user
+
+    def get_samples(self, user):
+        recipe = Recipe.objects.order_by("-pk").first()
+        tag = Tag.objects.order_by("pk").first()
+        ingredient = Ingredient.objects.order_by("pk").first()
+        return {
+            "recipes": recipe and recipe.pk,
+            "tags": tag and tag.pk,
+            "ingredients": ingredient and ingredient.pk,
+            "user": user.pk,
+        }
+
+    def get_scenarios(self, samples):
+        for pattern in iter_patterns(get_resolver("api.urls").url_patterns):
+            names = set(pattern.pattern.regex.groupindex)
+            if "format" in names or not allows_get(pattern.callback):
+                continue
+            sample = samples.get(pattern.name.rsplit("-", 1)[0])
+            if names and sample is None:
+                self.stderr.write(f"Пропущен {pattern.name}: нет данных.")
+                continue
+            url = reverse(pattern.name, kwargs=dict.fromkeys(names, sample))
+            for query in SCENARIOS.get(pattern.name, [""]):
+                yield f"{pattern.name}{query}", url + query
+
+    def measure(self, client, url, iterations, warmup):
+        timings = []
+        queries = 0
+        started = None
+        for number in range(warmup + iterations):
+            if number == warmup:
+                started = time.perf_counter()
+            with CaptureQueriesContext(connection) as context:
+                request_started = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                elapsed = (time.perf_counter() - request_started) * 1000
+            if number >= warmup:
+                timings.append(elapsed)
+                queries = max(queries, len(context))
+        return summarize(
+            url, response.status_code, timings, queries,
+            time.perf_counter() - started,
+        )
+
+    def compare(self, results, baseline, tolerance, min_delta):
+        regressions = []
+        for name, expected in baseline.items():
+            actual = results.get(name)
+            if actual is None:
+                regressions.append(f"{name}: маршрут не найден")
+                continue
+            if actual["queries"] > expected["queries"]:
+                regressions.append(
+                    f"{name}: запросов {actual['queries']} "
+                    f"вместо {expected['queries']}"
+                )
+            limit = expected["p95"] * (1 + tolerance)
+            if (
+                actual["p95"] > limit
+                and actual["p95"] - expected["p95"] > min_delta
+            ):
+                regressions.append(
+                    f"{name}: p95 {actual['p95']} мс "
+                    f"вместо {expected['p95']} мс"
+                )
+        return regressions
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 2:
+            raise CommandError("Нужно не меньше двух итераций.")
+        user = self.get_user(options["user"])
+        token, _ = Token.objects.get_or_create(user=user)
+        scenarios = self.get_scenarios(self.get_samples(user))
+
+        results = {}
+        if options["base_url"]:
+            client = LiveClient(
+                options["base_url"], token.key, options["concurrency"]
+            )
+            for name, url in scenarios:
+                results[name] = client.measure(
+                    url, options["iterations"], options["warmup"]
+                )
+        else:
+            client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+            hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+            with override_settings(ALLOWED_HOSTS=hosts):
+                for name, url in scenarios:
+                    results[name] = self.measure(
+                        client, url, options["iterations"], options["warmup"]
+                    )
+
+        self.stdout.write(
+            f"{'маршрут':<50}{'код':>5}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'rps':>9}{'SQL':>5}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<50}{result['status']:>5}{result['p50']:>9}"
+                f"{result['p95']:>9}{result['p99']:>9}"
+                f"{result['rps']:>9}{result['queries']:>5}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)
+            regressions = self.compare(
+                results, baseline,
+                options["tolerance"], options["min_delta_ms"],
+            )
+            if regressions:
+                raise CommandError(
+                    "Регрессии производительности:\n" + "\n".join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS("Регрессий нет."))
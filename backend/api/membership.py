@@ -0,0 +1,97 @@
+"""Кеш множеств рецептов в избранном и в корзине пользователя."""
+from array import array
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+from foodgram.models import Cart, Favorite
+
+# Первичные ключи - BigAutoField, поэтому храним 64-битные целые.
+TYPECODE = "q"
+KINDS = {Favorite: "favorite", Cart: "cart"}
+
+
+def get_cache():
+    return caches[settings.MEMBERSHIP_CACHE]
+
+
+def version_key(user_id, kind):
+    return f"membership:{kind}:{user_id}:version"
+
+
+def get_version(user_id, kind):
+    cache = get_cache()
+    key = version_key(user_id, kind)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(user_id, model):
+    """
+    Сбрасывает закешированное множество рецептов пользователя.
+
+    Меняется только версия: запрос, который параллельно прочитал
+    из базы старые данные, запишет их под старым ключом.
+    Вызывается сигналами при сохранении и удалении Favorite и Cart.
+    """
+    get_cache().set(
+        version_key(user_id, KINDS[model]), uuid4().hex, timeout=None
+    )
+
+
+def load_recipe_ids(user_id, model):
+    """Возвращает id рецептов пользователя из кеша или из базы."""
+    kind = KINDS[model]
+    cache = get_cache()
+    key = f"membership:{kind}:{user_id}:{get_version(user_id, kind)}"
+    packed = cache.get(key)
+    if packed is None:
+        ids = array(TYPECODE, sorted(
+            model.objects.filter(user=user_id)
+            .values_list("recipe_id", flat=True)
+        ))
+        cache.set(key, ids.tobytes(), settings.MEMBERSHIP_CACHE_TIMEOUT)
+    else:
+        ids = array(TYPECODE)
+        ids.frombytes(packed)
+    return frozenset(ids)
+
+
+class Membership:
+    """
+    Множества рецептов в избранном и в корзине пользователя.
+
+    Каждое множество загружается не больше одного раза за запрос,
+    после чего проверки is_favorited и is_in_shopping_cart
+    не обращаются ни к кешу, ни к базе.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.recipe_ids = {}
+
+    def contains(self, model, recipe_id):
+        if not self.user.is_authenticated:
+            return False
+        if model not in self.recipe_ids:
+            self.recipe_ids[model] = load_recipe_ids(self.user.pk, model)
+        return recipe_id in self.recipe_ids[model]
+
+    def is_favorited(self, recipe_id):
+        return self.contains(Favorite, recipe_id)
+
+    def is_in_shopping_cart(self, recipe_id):
+        return self.contains(Cart, recipe_id)
+
+
+def get_membership(request):
+    """Возвращает Membership текущего пользователя, общий для запроса."""
+    membership = getattr(request, "_membership", None)
+    if membership is None or membership.user != request.user:
+        membership = Membership(request.user)
+        request._membership = membership
+    return membership
@@ -0,0 +1,168 @@
+"""Метрики производительности запросов в памяти процесса."""
+import bisect
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+current_stats = ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    """Счетчики одного запроса: запросы к базе и время сериализации."""
+
+    __slots__ = (
+        "queries", "db_time", "serializer_time", "serializer_depth", "sql"
+    )
+
+    def __init__(self, capture_sql=False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.sql = [] if capture_sql else None
+
+    def record_query(self, execute, sql, params, many, context):
+        """Обертка для connection.execute_wrapper."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            if self.sql is not None:
+                self.sql.append((duration, sql))
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Постоянная обертка выполнения запросов для всех соединений.
+
+    Передает запрос в статистику текущего запроса, если она есть.
+    Контекстная переменная копируется в потоки sync_to_async, поэтому
+    учитываются и запросы асинхронных представлений из пула потоков.
+    """
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.record_query(execute, sql, params, many, context)
+
+
+class TimedSerializerMixin:
+    """
+    Миксин сериализатора, учитывающий время to_representation
+    в статистике текущего запроса. Вложенные сериализаторы
+    не учитываются повторно.
+    """
+
+    def to_representation(self, instance):
+        stats = current_stats.get()
+        if stats is None or stats.serializer_depth:
+            return super().to_representation(instance)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_time += time.perf_counter() - start
+            stats.serializer_depth -= 1
+
+
+class Histogram:
+    __slots__ = ("buckets", "total", "count")
+
+    def __init__(self):
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(DURATION_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class ViewMetrics:
+    __slots__ = ("duration", "queries", "db_time", "serializer_time")
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+
+class MetricsRegistry:
+    """Накопленные метрики по именам представлений."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._views = defaultdict(ViewMetrics)
+
+    def observe(self, view_name, duration, stats):
+        with self._lock:
+            metrics = self._views[view_name]
+            metrics.duration.observe(duration)
+            metrics.queries += stats.queries
+            metrics.db_time += stats.db_time
+            metrics.serializer_time += stats.serializer_time
+
+    def render(self):
+        """Возвращает метрики в текстовом формате Prometheus."""
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                "# HELP foodgram_request_duration_seconds "
+                "Время обработки запроса.",
+                "# TYPE foodgram_request_duration_seconds histogram",
+            ]
+            for view_name, metrics in views:
+                label = f'view="{view_name}"'
+                cumulative = 0
+                for bound, count in zip(
+                    DURATION_BUCKETS + ("+Inf",), metrics.duration.buckets
+                ):
+                    cumulative += count
+                    lines.append(
+                        "foodgram_request_duration_seconds_bucket"
+                        f'{{{label},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(
+                    f"foodgram_request_duration_seconds_sum{{{label}}} "
+                    f"{metrics.duration.total}"
+                )
+                lines.append(
+                    f"foodgram_request_duration_seconds_count{{{label}}} "
+                    f"{metrics.duration.count}"
+                )
+            for name, attribute, description in (
+                ("foodgram_request_db_queries_total", "queries",
+                 "Количество запросов к базе."),
+                ("foodgram_request_db_seconds_total", "db_time",
+                 "Время выполнения запросов к базе."),
+                ("foodgram_request_serializer_seconds_total",
+                 "serializer_time", "Время сериализации ответа."),
+            ):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for view_name, metrics in views:
+                    lines.append(
+                        f'{name}{{view="{view_name}"}} '
+                        f"{getattr(metrics, attribute)}"
+                    )
+        for path in settings.METRICS_GAUGES:
+            for name, labels, value in import_string(path)():
+                label = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from api.metrics import RequestStats, current_stats, registry
+from api.replicas import choose_database, read_database, stick_after_write
+
+logger = logging.getLogger("foodgram.performance")
+
+
+class PerformanceMiddleware:
+    """
+    Замеряет время запроса, количество и время запросов к базе
+    и время сериализации по имени представления (например,
+    recipes-list). Результаты попадают в гистограммы процесса
+    и в заголовок Server-Timing. Запросы дольше SLOW_REQUEST_MS
+    записываются в лог вместе с выполненным SQL.
+
+    Запросы к базе учитывает обертка api.metrics.record_query,
+    которая ставится на каждое соединение при его создании.
+    Middleware работает и под WSGI, и под ASGI.
+
+    Тело потокового ответа (StreamingHttpResponse) строится уже после
+    выхода из middleware, поэтому его содержимое оборачивается: запросы
+    к базе при выдаче тела попадают в статистику, а в гистограммы
+    и лог запрос записывается после выдачи последней части. Заголовок
+    Server-Timing такого ответа отправляется раньше тела и учитывает
+    только время до начала выдачи.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django определяет асинхронный режим middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = RequestStats(capture_sql=settings.SLOW_REQUEST_MS > 0)
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.process(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats = RequestStats(capture_sql=settings.SLOW_REQUEST_MS > 0)
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.process(request, response, stats, start)
+
+    def process(self, request, response, stats, start):
+        duration = time.perf_counter() - start
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = (
+                f"app;dur={duration * 1000:.1f}, "
+                f'db;dur={stats.db_time * 1000:.1f};'
+                f'desc="{stats.queries} queries", '
+                f"ser;dur={stats.serializer_time * 1000:.1f}"
+            )
+        if response.streaming:
+            response.streaming_content = self.stream(
+                request, response.streaming_content, stats, start
+            )
+        else:
+            self.record(request, stats, duration)
+        return response
+
+    def stream(self, request, content, stats, start):
+        """Выдает тело ответа, учитывая его построение в stats."""
+        content = iter(content)
+        try:
+            while True:
+                token = current_stats.set(stats)
+                try:
+                    chunk = next(content)
+                except StopIteration:
+                    return
+                finally:
+                    current_stats.reset(token)
+                yield chunk
+        finally:
+            self.record(request, stats, time.perf_counter() - start)
+
+    def record(self, request, stats, duration):
+        match = request.resolver_match
+        view_name = match.url_name if match and match.url_name else "other"
+        registry.observe(view_name, duration, stats)
+        if 0 < settings.SLOW_REQUEST_MS <= duration * 1000:
+            self.log_slow_request(request, view_name, duration, stats)
+
+    def log_slow_request(self, request, view_name, duration, stats):
+        queries = "\n".join(
+            f"  {query_time * 1000:.1f} ms: {sql}"
+            for query_time, sql in stats.sql
+        )
+        logger.warning(
+            "Медленный запрос %s %s (%s): %.1f ms, %d запросов к базе "
+            "(%.1f ms), сериализация %.1f ms\n%s",
+            request.method, request.get_full_path(), view_name,
+            duration * 1000, stats.queries, stats.db_time * 1000,
+            stats.serializer_time * 1000, queries,
+        )
+
+
+class ReplicaMiddleware:
+    """
+    Отправляет чтения безопасных запросов на реплики из DB_REPLICAS
+    (см. api.replicas). Без реплик отключается.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = read_database.set(choose_database(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        stick_after_write(request)
+        return response
+
+    async def __acall__(self, request):
+        database = await sync_to_async(
+            choose_database, thread_sensitive=False
+        )(request)
+        token = read_database.set(database)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        await sync_to_async(
+            stick_after_write, thread_sensitive=False
+        )(request)
+        return response
@@ -0,0 +1,50 @@
+"""Быстрый JSON-рендерер на orjson с откатом на стандартный."""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, сериализующий ответы через orjson.
+
+    Вывод совпадает с JSONRenderer: компактные разделители, символы
+    не в ASCII без экранирования, U+2028 и U+2029 экранируются.
+    Дата и время, Decimal и прочие типы отдаются кодировщику DRF.
+    Если orjson не установлен, запрошен отступ или данные ему
+    не по силам (например, целые больше 64 бит), используется
+    обычный JSONRenderer.
+    """
+
+    options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if orjson else 0
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=self.options,
+            )
+        except TypeError:
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        return content.replace(
+            b"\xe2\x80\xa8", b"\\u2028"
+        ).replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -0,0 +1,85 @@
+"""
+Чтение с реплик базы для безопасных запросов API.
+
+ReplicaMiddleware выбирает для запроса базу чтения и кладет ее алиас
+в read_database, а ReplicaRouter направляет туда чтения. Запись и все,
+что выполняется вне запроса (команды, обработка изображений), идет
+в основную базу.
+
+Чтобы клиент видел свои изменения, после POST, PUT, PATCH и DELETE
+его запросы REPLICA_STICKY_SECONDS секунд читают из основной базы.
+Клиент определяется по хешу заголовка Authorization или cookie сессии.
+Изменение общих данных (bump_version) так же закрепляет за основной
+базой всех: иначе кеш с новой версией заполнился бы старыми данными
+с отстающей реплики.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+read_database = ContextVar("read_database", default=None)
+
+STICKY_ALL_KEY = "replica:sticky:all"
+# Токены только что вошедших пользователей могут еще не дойти до реплик.
+PRIMARY_MODELS = {"authtoken.token"}
+
+
+def client_key(request):
+    credentials = request.META.get("HTTP_AUTHORIZATION") or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    return "replica:sticky:" + hashlib.sha256(credentials.encode()).hexdigest()
+
+
+def stick(key=STICKY_ALL_KEY):
+    """Закрепляет чтения за основной базой на REPLICA_STICKY_SECONDS."""
+    if settings.DATABASE_REPLICAS:
+        cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+
+
+def choose_database(request):
+    """Алиас базы для чтений запроса или None для основной базы."""
+    if request.method not in SAFE_METHODS:
+        return None
+    keys = [STICKY_ALL_KEY]
+    key = client_key(request)
+    if key is not None:
+        keys.append(key)
+    if cache.get_many(keys):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def stick_after_write(request):
+    if request.method not in SAFE_METHODS:
+        key = client_key(request)
+        if key is not None:
+            stick(key)
+
+
+class ReplicaRouter:
+    """Направляет чтения в базу, выбранную ReplicaMiddleware."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -1,15 +1,29 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
 from djoser.serializers import UserCreateSerializer
 from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from api import fast_serializers
+from api.caching import representation_keys
+from api.fast_serializers import FastPathMixin
+from api.fields import (
+    BulkPrimaryKeyRelatedField, RenditionsField, resolve_pks
+)
+from api.membership import get_membership
+from api.metrics import TimedSerializerMixin
+from foodgram.images import enqueue_renditions
 from foodgram.models import (
     Cart, Favorite, Ingredient, IngredientRecipe,
-    Recipe, Subscription, Tag, User
+    Recipe, Subscription, Tag, User, recipe_prefetches, tag_bits
 )
+from foodgram.signals import defer_touch
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для пользовательской модели."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -56,7 +70,9 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return data
 
 
-class SubscriptionListSerializer(serializers.ModelSerializer):
+class SubscriptionListSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """
     Сериализатор для модели подписок,
 
@@ -69,7 +85,7 @@ class SubscriptionListSerializer(serializers.ModelSerializer):
     first_name = serializers.ReadOnlyField(source="author.first_name")
     last_name = serializers.ReadOnlyField(source="author.last_name")
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source="author.recipes.count")
+    recipes_count = serializers.SerializerMethodField()
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -89,22 +105,26 @@ class SubscriptionListSerializer(serializers.ModelSerializer):
         extra_kwargs = {"recipes_limit": {"write_only": True}}
 
     def get_is_subscribed(self, obj):
-        """Метод проверки подписки."""
-        user_id = self.context.get("request").user.id
-        return Subscription.objects.filter(
-            author=obj.author, user=user_id
-        ).exists()
+        """
+        Метод проверки подписки.
+
+        Сериализуются подписки текущего пользователя,
+        поэтому он всегда подписан на автора.
+        """
+        return True
 
     def get_recipes(self, obj):
         """Метод получения рецепта с параметрами."""
-        recipes_limit = self.context.get("request").query_params.get(
-            "recipes_limit"
-        )
-        author_recipes = (
-            obj.author.recipes.all()[: int(recipes_limit)]
-            if recipes_limit
-            else obj.author.recipes.all()
-        )
+        if hasattr(obj.author, "limited_recipes"):
+            author_recipes = obj.author.limited_recipes
+        else:
+            recipes_limit = self.context.get("request").query_params.get(
+                "recipes_limit"
+            )
+            recipes = obj.author.recipes.order_by("-created_at", "-id")
+            author_recipes = (
+                recipes[: int(recipes_limit)] if recipes_limit else recipes
+            )
         if author_recipes:
             serializer = ShortInfoRecipeSerializer(
                 author_recipes,
@@ -116,28 +136,40 @@ class SubscriptionListSerializer(serializers.ModelSerializer):
 
     def get_recipes_count(self, obj):
         """Количество рецептов автора."""
-        return Recipe.objects.filter(author=obj.id).count()
+        return obj.author.recipes_count
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(
+    TimedSerializerMixin, FastPathMixin, serializers.ModelSerializer
+):
     """Сериализатор для тегов."""
 
+    fast_representation = staticmethod(fast_serializers.tag)
+
     class Meta:
         model = Tag
         fields = ["id", "name", "color", "slug"]
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    TimedSerializerMixin, FastPathMixin, serializers.ModelSerializer
+):
     """Сериализатор для ингредиентов."""
 
+    fast_representation = staticmethod(fast_serializers.ingredient)
+
     class Meta:
         model = Ingredient
         fields = ["id", "name", "measurement_unit"]
 
 
-class IngredientsRecipeSerializer(serializers.ModelSerializer):
+class IngredientsRecipeSerializer(
+    FastPathMixin, serializers.ModelSerializer
+):
     """Сериализатор для описания ингредиентов в рецепте."""
 
+    fast_representation = staticmethod(fast_serializers.ingredient_amount)
+
     name = serializers.CharField(source="ingredient.name", read_only=True)
     id = serializers.PrimaryKeyRelatedField(
         source="ingredient.id", read_only=True)
@@ -151,11 +183,14 @@ class IngredientsRecipeSerializer(serializers.ModelSerializer):
 
 
 class NewIngredientAddSerializer(serializers.ModelSerializer):
-    """Сериализатор для добавления ингредиента."""
+    """
+    Сериализатор для добавления ингредиента.
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(), source="ingredient"
-    )
+    Существование ингредиентов проверяется в RecipeCreateSerializer
+    одним запросом для всего списка.
+    """
+
+    id = serializers.IntegerField(source="ingredient")
 
     class Meta:
         model = IngredientRecipe
@@ -168,7 +203,7 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     author = UserCreateSerializer(read_only=True)
     ingredients = NewIngredientAddSerializer(
         many=True, write_only=True, required=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(), many=True)
     image = Base64ImageField()
 
@@ -186,6 +221,16 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         )
         ordering = ["-id"]
 
+    def validate_ingredients(self, ingredients):
+        """Загружает все ингредиенты рецепта одним запросом."""
+        objects = resolve_pks(
+            Ingredient.objects.all(),
+            [item["ingredient"] for item in ingredients],
+        )
+        for item, ingredient in zip(ingredients, objects):
+            item["ingredient"] = ingredient
+        return ingredients
+
     def validate(self, data):
         if "tags" not in data or len(data["tags"]) < 1:
             raise serializers.ValidationError("Должен быть хотя бы один тег")
@@ -225,30 +270,96 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             for ingredient in ingredients
         )
 
+    def update_ingredients(self, recipe, ingredients):
+        """
+        Приводит ингредиенты рецепта к переданному списку.
+
+        Удаляются, изменяются и добавляются только отличающиеся строки.
+        """
+        existing = {
+            item.ingredient_id: item
+            for item in recipe.ingredientrecipe_set.all()
+        }
+        amounts = {
+            item["ingredient"].id: item["amount"] for item in ingredients
+        }
+        removed = existing.keys() - amounts.keys()
+        changed = []
+        for ingredient_id, item in existing.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and item.amount != amount:
+                item.amount = amount
+                changed.append(item)
+        added = [
+            IngredientRecipe(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing
+        ]
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ["amount"])
+        if added:
+            IngredientRecipe.objects.bulk_create(added)
+
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context["request"].user
         tags_data = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
-        recipe = Recipe.objects.create(author=author, **validated_data)
-        recipe.tags.set(tags_data)
+        recipe = Recipe.objects.create(
+            author=author,
+            tags_mask=tag_bits(tag.pk for tag in tags_data),
+            **validated_data,
+        )
+        with defer_touch(recipe):
+            recipe.tags.set(tags_data)
         self.get_ingredients(recipe, ingredients)
+        enqueue_renditions(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        instance.tags.set(tags)
-        self.get_ingredients(instance, ingredients)
-        return super().update(instance, validated_data)
+        # Рецепт сохраняется один раз в конце вместе с маской тегов
+        # и временем изменения.
+        with defer_touch(instance):
+            instance.tags.set(tags)
+            self.update_ingredients(instance, ingredients)
+        instance = super().update(instance, validated_data)
+        if "image" in validated_data:
+            enqueue_renditions(instance)
+        return instance
 
     def to_representation(self, instance):
         context = {"request": self.context.get("request")}
         return RecipeListSerializer(instance, context=context).data
 
 
-class RecipeListSerializer(serializers.ModelSerializer):
-    """Сериализатор для списка рецептов."""
+class CachedRecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов, собираемый из кеша представлений."""
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        return self.child.to_representations(list(data))
+
+
+class RecipeListSerializer(
+    TimedSerializerMixin, FastPathMixin, serializers.ModelSerializer
+):
+    """
+    Сериализатор для списка рецептов.
+
+    Представление рецепта без флагов is_favorited и is_in_shopping_cart
+    одинаково для всех пользователей и хранится в кеше. Связи рецептов
+    подгружаются только для промахов кеша.
+    """
 
     author = UserCreateSerializer(read_only=True)
     ingredients = IngredientsRecipeSerializer(
@@ -257,6 +368,9 @@ class RecipeListSerializer(serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    renditions = RenditionsField()
+
+    fast_representation = staticmethod(fast_serializers.recipe)
 
     class Meta:
         model = Recipe
@@ -267,24 +381,54 @@ class RecipeListSerializer(serializers.ModelSerializer):
             "ingredients",
             "name",
             "image",
+            "renditions",
             "text",
             "cooking_time",
             "is_favorited",
             "is_in_shopping_cart",
         )
         ordering = ["-id"]
+        list_serializer_class = CachedRecipeListSerializer
+
+    def to_representation(self, instance):
+        return self.to_representations([instance])[0]
+
+    def to_representations(self, recipes):
+        """Представления рецептов с флагами текущего пользователя."""
+        request = self.context["request"]
+        keys = representation_keys(request, recipes)
+        cached = cache.get_many(keys.values())
+        missing = [
+            recipe for recipe in recipes if keys[recipe.pk] not in cached
+        ]
+        if missing:
+            prefetch_related_objects(missing, "author", *recipe_prefetches())
+            fresh = {}
+            for recipe in missing:
+                fresh[keys[recipe.pk]] = super().to_representation(recipe)
+            cache.set_many(fresh, settings.RECIPE_CACHE_TIMEOUT)
+            cached.update(fresh)
+
+        membership = get_membership(request)
+        representations = []
+        for recipe in recipes:
+            data = dict(cached[keys[recipe.pk]])
+            data["is_favorited"] = membership.is_favorited(recipe.pk)
+            data["is_in_shopping_cart"] = membership.is_in_shopping_cart(
+                recipe.pk
+            )
+            representations.append(data)
+        return representations
 
     def get_is_favorited(self, obj):
         """Добавлен ли рецепт в избранное."""
-        user_id = self.context.get("request").user.id
-        return Favorite.objects.filter(user=user_id, recipe=obj.id).exists()
+        return get_membership(self.context["request"]).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
         """Добавлен ли рецепт в список покупок."""
-        user_id = self.context.get("request").user.id
-        return Cart.objects.filter(
-            user=user_id, recipe=obj.id
-        ).exists()
+        return get_membership(
+            self.context["request"]
+        ).is_in_shopping_cart(obj.id)
 
 
 class CartSerializer(serializers.ModelSerializer):
@@ -306,12 +450,18 @@ class CartSerializer(serializers.ModelSerializer):
         return ShortInfoRecipeSerializer(instance.recipe, context=context).data
 
 
-class ShortInfoRecipeSerializer(serializers.ModelSerializer):
+class ShortInfoRecipeSerializer(
+    TimedSerializerMixin, FastPathMixin, serializers.ModelSerializer
+):
     """Краткий сериализатор для рецепта."""
 
+    renditions = RenditionsField()
+
+    fast_representation = staticmethod(fast_serializers.short_recipe)
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = ("id", "name", "image", "renditions", "cooking_time")
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -0,0 +1,64 @@
+"""Формирование списка покупок в разных форматах."""
+import csv
+import json
+
+from django.db.models import F, Sum
+
+from foodgram.models import IngredientRecipe
+
+
+class Echo:
+    """Псевдо-буфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def get_shopping_list(user):
+    """
+    Возвращает ингредиенты из корзины пользователя, сгруппированные
+    по названию и единице измерения, одним запросом.
+    """
+    return (
+        IngredientRecipe.objects.filter(recipe__cart_recipe__user=user)
+        .values(
+            name=F("ingredient__name"),
+            measurement_unit=F("ingredient__measurement_unit"),
+        )
+        .annotate(amount=Sum("amount"))
+        .order_by("name")
+    )
+
+
+def render_txt(rows):
+    """Построчно формирует текстовый список покупок."""
+    yield "Список покупок:\n"
+    for row in rows:
+        yield f"{row['name']}: {row['amount']}, {row['measurement_unit']}\n"
+
+
+def render_csv(rows):
+    """Построчно формирует список покупок в формате CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(("name", "amount", "measurement_unit"))
+    for row in rows:
+        yield writer.writerow(
+            (row["name"], row["amount"], row["measurement_unit"])
+        )
+
+
+def render_json(rows):
+    """Построчно формирует список покупок в формате JSON."""
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(row, ensure_ascii=False)
+        separator = ","
+    yield "]"
+
+
+SHOPPING_LIST_FORMATS = {
+    "txt": ("text/plain; charset=utf-8", render_txt),
+    "csv": ("text/csv; charset=utf-8", render_csv),
+    "json": ("application/json", render_json),
+}
@@ -0,0 +1,95 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_token
+from api.caching import bump_version
+from api.membership import invalidate
+from api.metrics import record_query
+from foodgram.models import Cart, Favorite, Ingredient, Recipe, Tag, User
+
+# Поля пользователя, которые выводятся в представлении рецепта.
+AUTHOR_FIELDS = ("username", "first_name", "last_name", "email")
+
+
+@receiver((post_save, post_delete), sender=Tag)
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_reference_data(sender, **kwargs):
+    """
+    Меняет версию справочника при изменении его данных, а также
+    версию представлений рецептов, которые их включают.
+    """
+    bump_version(sender)
+    bump_version(Recipe)
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=Cart)
+def invalidate_membership(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш избранного и корзины пользователя при любом
+    изменении: через API, в админке, каскадом при удалении рецепта
+    или пользователя и при удалении через QuerySet.delete().
+    bulk_create и update() сигналов не вызывают.
+    """
+    invalidate(instance.user_id, sender)
+
+
+@receiver(pre_save, sender=User)
+def detect_author_changes(sender, instance, using, update_fields=None,
+                          **kwargs):
+    """
+    Запоминает, меняет ли сохранение поля автора, которые выводятся
+    в рецептах. Смена пароля или is_active кеш рецептов не сбрасывает.
+    """
+    instance._author_changed = False
+    if instance._state.adding:
+        return
+    fields = [
+        field for field in AUTHOR_FIELDS
+        if update_fields is None or field in update_fields
+    ]
+    if not fields:
+        return
+    stored = (
+        User.objects.using(using).filter(pk=instance.pk)
+        .values(*fields).first()
+    )
+    instance._author_changed = stored is None or any(
+        stored[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, **kwargs):
+    """Сбрасывает представления рецептов при изменении данных автора."""
+    if getattr(instance, "_author_changed", False):
+        bump_version(Recipe)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Убирает из кеша удаленный токен, в том числе при выходе."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Убирает из кеша токены пользователя при изменении его данных,
+    например пароля или флага is_active.
+    """
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        "key", flat=True
+    ):
+        invalidate_token(key)
+
+
+@receiver(connection_created)
+def track_queries(sender, connection, **kwargs):
+    """Подключает учет запросов к базе для метрик производительности."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,78 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import local_cache
+
+
+# Тесты не трогают кеши, заданные в настройках, например каталог
+# FileBasedCache на диске.
+TEST_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": f"tests:{alias}",
+    }
+    for alias in settings.CACHES
+}
+
+
+def clear_caches():
+    """Очищает все кеши, чтобы запрос целиком шел в базу."""
+    for cache in caches.all():
+        cache.clear()
+    local_cache.clear()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ApiTestCase(TestCase):
+    """Тесты с кешами в памяти процесса, пустыми перед каждым тестом."""
+
+    def setUp(self):
+        clear_caches()
+
+    def get_client(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+
+class TemporaryMediaMixin:
+    """Файлы, которые сохраняет тест, пишутся во временный каталог."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+
+class DatasetTestCase(TemporaryMediaMixin, ApiTestCase):
+    """
+    Тесты на синтетических данных generate_dataset.
+
+    Параметры генерации задаются атрибутом dataset, изображения
+    сохраняются во временный каталог.
+    """
+
+    dataset = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_dataset", seed=0, stdout=StringIO(), **cls.dataset
+        )
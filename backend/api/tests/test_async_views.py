@@ -0,0 +1,112 @@
+import json
+from io import StringIO
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from api.tests.base import TEST_CACHES, TemporaryMediaMixin, clear_caches
+from foodgram.models import Ingredient, Recipe, Tag, User
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncViewsTest(TemporaryMediaMixin, TransactionTestCase):
+    """
+    Асинхронные представления foodgram_backend.asgi_urls отвечают так же,
+    как синхронные: с тем же кодом и телом для анонимного клиента,
+    пользователя и неверного токена.
+
+    Асинхронные представления ходят в базу из других потоков, поэтому
+    данные должны быть записаны, а не лежать в транзакции теста.
+    """
+
+    def setUp(self):
+        call_command(
+            "generate_dataset", seed=0, stdout=StringIO(), users=6,
+            recipes=30, favorites_per_user=5, carts_per_user=4,
+            subscriptions_per_user=3,
+        )
+        user = (
+            User.objects.annotate(subscriptions=Count("subscriber"))
+            .order_by("-subscriptions", "-pk").first()
+        )
+        token = Token.objects.create(user=user)
+        self.headers = {
+            "anonymous": {},
+            "user": {"AUTHORIZATION": f"Token {token.key}"},
+            "bad token": {"AUTHORIZATION": "Token bad"},
+        }
+        recipe = Recipe.objects.order_by("-pk").first()
+        tag = Tag.objects.order_by("pk").first()
+        ingredient = Ingredient.objects.order_by("pk").first()
+        recipes = reverse("recipes-list")
+        self.urls = [
+            recipes,
+            f"{recipes}?limit=3&page=2",
+            f"{recipes}?page=1000",
+            f"{recipes}?tags={tag.slug}",
+            f"{recipes}?is_favorited=1",
+            f"{recipes}?is_in_shopping_cart=1",
+            f"{recipes}?author={user.pk}",
+            f"{recipes}?author=0",
+            f"{recipes}?ordering=popular",
+            f"{recipes}?{urlencode({'search': recipe.name.split()[0]})}",
+            reverse("recipes-detail", args=[recipe.pk]),
+            reverse("recipes-detail", args=[0]),
+            reverse("tags-list"),
+            reverse("tags-detail", args=[tag.pk]),
+            reverse("tags-detail", args=[0]),
+            f"{reverse('ingredients-list')}?"
+            f"{urlencode({'name': ingredient.name[:2]})}",
+            reverse("ingredients-detail", args=[ingredient.pk]),
+            reverse("users-subscriptions"),
+            f"{reverse('users-subscriptions')}?recipes_limit=1",
+            *(
+                f"{reverse('recipes-download_shopping_cart')}"
+                f"?file_format={file_format}"
+                for file_format in ("txt", "csv", "json", "xml")
+            ),
+        ]
+
+    def tearDown(self):
+        clear_caches()
+
+    def sync_get(self, url, headers):
+        clear_caches()
+        extra = {f"HTTP_{name}": value for name, value in headers.items()}
+        return self.client.get(url, **extra)
+
+    def async_get(self, url, headers):
+        clear_caches()
+        with self.settings(ROOT_URLCONF="foodgram_backend.asgi_urls"):
+            return async_to_sync(self.async_client.get)(url, **headers)
+
+    @staticmethod
+    def body(response):
+        if response.streaming:
+            return b"".join(response.streaming_content)
+        return response.content
+
+    def test_same_responses(self):
+        for client, headers in self.headers.items():
+            for url in self.urls:
+                with self.subTest(client=client, url=url):
+                    expected = self.sync_get(url, headers)
+                    actual = self.async_get(url, headers)
+                    self.assertEqual(
+                        actual.status_code, expected.status_code
+                    )
+                    self.assertEqual(
+                        actual["Content-Type"], expected["Content-Type"]
+                    )
+                    actual, expected = self.body(actual), self.body(expected)
+                    if url.endswith("txt") or url.endswith("csv"):
+                        self.assertEqual(actual, expected)
+                    else:
+                        self.assertEqual(
+                            json.loads(actual), json.loads(expected)
+                        )
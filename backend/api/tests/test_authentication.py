@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from api.authentication import cache_key, local_cache
+from api.tests.base import ApiTestCase
+from foodgram.models import User
+
+
+class CachedTokenAuthenticationTest(ApiTestCase):
+    """Кеш токенов по умолчанию общий для всех процессов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com",
+            username="user",
+            first_name="Имя",
+            last_name="Фамилия",
+            password="Ne-prostoi-parol-42",
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.get_client(self.user)
+
+    def test_token_is_cached(self):
+        self.client.get(reverse("user-me"))
+        # Пользователь по id из общего кеша и проверка подписки на себя
+        # в UserSerializer.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("user-me"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["email"], self.user.email)
+
+    def test_shared_cache_keeps_only_user_id(self):
+        self.client.get(reverse("user-me"))
+        key = Token.objects.get(user=self.user).key
+        self.assertEqual(caches["default"].get(cache_key(key)), self.user.pk)
+
+    def test_local_cache(self):
+        with mock.patch.object(local_cache, "ttl", 60):
+            self.client.get(reverse("user-me"))
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse("user-me"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_inactive_user_from_shared_cache(self):
+        self.client.get(reverse("user-me"))
+        # update() не вызывает сигналов, и запись остается в кеше.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get(reverse("user-me"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_invalidates_token(self):
+        self.client.get(reverse("user-me"))
+        response = self.client.post(reverse("logout"))
+        self.assertEqual(response.status_code, 204)
+        response = self.client.get(reverse("user-me"))
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,155 @@
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+from psycopg2 import extensions
+
+from api.metrics import registry
+from foodgram_backend.postgresql.base import ConnectionPool, get_pool, pools
+
+
+class FakeCursor:
+    """Курсор FakeConnection: SELECT 1 падает у сломанного соединения."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql):
+        self.connection.checks += 1
+        if self.connection.broken:
+            raise OperationalError("server closed the connection")
+
+
+class FakeConnection:
+    """Соединение psycopg2 без сервера."""
+
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+        self.checks = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise OperationalError("server closed the connection")
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    """Выдача, ожидание, пересоздание и проверка соединений пула."""
+
+    def make_pool(self, **options):
+        return ConnectionPool(**{
+            "name": "test",
+            "size": 2,
+            "timeout": 0.01,
+            "max_lifetime": 60,
+            "check_interval": 60,
+            **options,
+        })
+
+    def test_acquire_reuses_released_connection(self):
+        pool = self.make_pool()
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection), first)
+        self.assertEqual(pool.created, 1)
+        self.assertEqual(pool.acquired, 2)
+        self.assertEqual(pool.in_use, 1)
+        self.assertEqual(first.checks, 0)
+
+    def test_timeout(self):
+        pool = self.make_pool(size=1)
+        connection = pool.acquire(FakeConnection)
+        with self.assertRaises(OperationalError):
+            pool.acquire(FakeConnection)
+        self.assertEqual(pool.timeouts, 1)
+        pool.release(connection)
+        self.assertIs(pool.acquire(FakeConnection), connection)
+
+    def test_failed_connect_frees_slot(self):
+        pool = self.make_pool(size=1)
+
+        def connect():
+            raise OperationalError("could not connect")
+
+        with self.assertRaises(OperationalError):
+            pool.acquire(connect)
+        self.assertIsInstance(pool.acquire(FakeConnection), FakeConnection)
+
+    def test_max_lifetime(self):
+        pool = self.make_pool(max_lifetime=0)
+        old = pool.acquire(FakeConnection)
+        pool.release(old)
+        new = pool.acquire(FakeConnection)
+        self.assertIsNot(new, old)
+        self.assertTrue(old.closed)
+        self.assertEqual(pool.created, 2)
+
+    def test_health_check(self):
+        pool = self.make_pool(check_interval=0)
+        healthy = pool.acquire(FakeConnection)
+        pool.release(healthy)
+        self.assertIs(pool.acquire(FakeConnection), healthy)
+        self.assertEqual(healthy.checks, 1)
+        pool.release(healthy)
+        healthy.broken = True
+        replacement = pool.acquire(FakeConnection)
+        self.assertIsNot(replacement, healthy)
+        self.assertTrue(healthy.closed)
+        self.assertEqual(pool.failed_checks, 1)
+
+    def test_release_rolls_back_open_transaction(self):
+        pool = self.make_pool()
+        connection = pool.acquire(FakeConnection)
+        connection.status = extensions.TRANSACTION_STATUS_INTRANS
+        pool.release(connection)
+        self.assertEqual(
+            connection.status, extensions.TRANSACTION_STATUS_IDLE
+        )
+        self.assertIs(pool.acquire(FakeConnection), connection)
+
+    def test_release_discards_broken_connection(self):
+        pool = self.make_pool()
+        connection = pool.acquire(FakeConnection)
+        connection.status = extensions.TRANSACTION_STATUS_INERROR
+        connection.broken = True
+        pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.in_use, 0)
+        self.assertIsNot(pool.acquire(FakeConnection), connection)
+
+
+class PoolMetricsTest(SimpleTestCase):
+    """Метрики пула попадают в /api/metrics/ через METRICS_GAUGES."""
+
+    def tearDown(self):
+        for key in [key for key, pool in pools.items() if pool is self.pool]:
+            del pools[key]
+
+    def test_metrics(self):
+        options = {
+            "SIZE": 3, "TIMEOUT": 1, "MAX_LIFETIME": 60, "CHECK_INTERVAL": 1,
+        }
+        self.pool = get_pool({"database": "metrics_test"}, options)
+        self.assertIs(
+            get_pool({"database": "metrics_test"}, options), self.pool
+        )
+        self.assertIn(
+            'foodgram_db_pool_size{db="metrics_test"} 3', registry.render()
+        )
+        with override_settings(METRICS_GAUGES=[]):
+            self.assertNotIn("foodgram_db_pool_size", registry.render())
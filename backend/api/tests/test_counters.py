@@ -0,0 +1,67 @@
+from django.urls import reverse
+
+from api.tests.base import ApiTestCase
+from foodgram.models import Cart, Favorite, Recipe, User
+
+PASSWORD = "Ne-prostoi-parol-42"
+
+
+class CountersTest(ApiTestCase):
+    """Полное сохранение объекта не перезаписывает счетчики."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Автор",
+            last_name="Рецептов",
+            password=PASSWORD,
+        )
+
+    def create_recipe(self):
+        return Recipe.objects.create(
+            author=self.user,
+            name="Рецепт",
+            text="Описание",
+            image="recipe_images/recipe.png",
+            cooking_time=10,
+        )
+
+    def test_set_password_keeps_recipes_count(self):
+        client = self.get_client(self.user)
+        # Пользователь попадает в кеш токенов до создания рецепта.
+        client.get(reverse("user-me"))
+        self.create_recipe()
+        response = client.post(
+            reverse("user-set-password"),
+            {"current_password": PASSWORD, "new_password": PASSWORD + "!"},
+        )
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipes_count, 1)
+        self.assertTrue(self.user.check_password(PASSWORD + "!"))
+
+    def test_recipe_save_keeps_counters(self):
+        recipe = self.create_recipe()
+        Favorite.objects.create(user=self.user, recipe=recipe)
+        Cart.objects.create(user=self.user, recipe=recipe)
+        recipe.name = "Новое название"
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, "Новое название")
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(recipe.cart_count, 1)
+
+    def test_explicit_update_fields_save_counters(self):
+        recipe = self.create_recipe()
+        recipe.favorites_count = 5
+        recipe.save(update_fields=["favorites_count"])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 5)
+
+    def test_deleted_row_is_inserted_again(self):
+        recipe = self.create_recipe()
+        Recipe.objects.filter(pk=recipe.pk).delete()
+        recipe.save()
+        self.assertTrue(Recipe.objects.filter(pk=recipe.pk).exists())
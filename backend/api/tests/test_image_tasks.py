@@ -0,0 +1,133 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from api.tests.base import ApiTestCase
+from foodgram.constants import IMAGE_TASK_MAX_ATTEMPTS, IMAGE_TASK_RETRY_DELAY
+from foodgram.images import release_stale_tasks, run_task
+from foodgram.models import Recipe, RecipeImageTask, User
+
+
+@mock.patch("foodgram.images.build_renditions")
+class ImageTaskTest(ApiTestCase):
+    """Переходы задач очереди изображений между состояниями."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Автор",
+            last_name="Рецептов",
+            password="Ne-prostoi-parol-42",
+        )
+        cls.recipe = Recipe.objects.create(
+            author=user,
+            name="Рецепт",
+            text="Описание",
+            image="recipe_images/recipe.png",
+            cooking_time=10,
+        )
+
+    def create_task(self, **kwargs):
+        return RecipeImageTask.objects.create(recipe=self.recipe, **kwargs)
+
+    def test_claim(self, build_renditions):
+        task = self.create_task()
+        run_task(task.pk)
+        build_renditions.assert_called_once_with(self.recipe)
+        task.refresh_from_db()
+        self.assertEqual(task.status, RecipeImageTask.DONE)
+        self.assertEqual(task.attempts, 1)
+        self.assertIsNone(task.claimed_at)
+        # Завершенную задачу повторно не выполняют.
+        run_task(task.pk)
+        build_renditions.assert_called_once()
+
+    def test_claimed_task_is_skipped(self, build_renditions):
+        task = self.create_task(
+            status=RecipeImageTask.PROCESSING, claimed_at=timezone.now()
+        )
+        run_task(task.pk)
+        build_renditions.assert_not_called()
+
+    def test_retry_with_backoff(self, build_renditions):
+        build_renditions.side_effect = OSError("broken image")
+        task = self.create_task()
+        for attempt in (1, 2):
+            with self.subTest(attempt=attempt):
+                start = timezone.now()
+                run_task(task.pk)
+                task.refresh_from_db()
+                self.assertEqual(task.status, RecipeImageTask.PENDING)
+                self.assertEqual(task.attempts, attempt)
+                self.assertEqual(task.error, "broken image")
+                self.assertIsNone(task.claimed_at)
+                delay = timedelta(
+                    seconds=IMAGE_TASK_RETRY_DELAY * 2 ** (attempt - 1)
+                )
+                self.assertGreaterEqual(task.available_at, start + delay)
+                # До конца паузы задачу не берут.
+                run_task(task.pk)
+                self.assertEqual(build_renditions.call_count, attempt)
+                RecipeImageTask.objects.filter(pk=task.pk).update(
+                    available_at=start
+                )
+
+    def test_failed_after_max_attempts(self, build_renditions):
+        build_renditions.side_effect = OSError("broken image")
+        task = self.create_task(attempts=IMAGE_TASK_MAX_ATTEMPTS - 1)
+        run_task(task.pk)
+        task.refresh_from_db()
+        self.assertEqual(task.status, RecipeImageTask.FAILED)
+        self.assertEqual(task.attempts, IMAGE_TASK_MAX_ATTEMPTS)
+        self.assertEqual(task.error, "broken image")
+
+    @override_settings(IMAGE_TASK_CLAIM_TIMEOUT=60)
+    def test_release_stale_tasks(self, build_renditions):
+        now = timezone.now()
+        stale = self.create_task(
+            status=RecipeImageTask.PROCESSING,
+            attempts=1,
+            claimed_at=now - timedelta(seconds=120),
+        )
+        exhausted = self.create_task(
+            status=RecipeImageTask.PROCESSING,
+            attempts=IMAGE_TASK_MAX_ATTEMPTS,
+            claimed_at=now - timedelta(seconds=120),
+        )
+        active = self.create_task(
+            status=RecipeImageTask.PROCESSING,
+            attempts=1,
+            claimed_at=now - timedelta(seconds=30),
+        )
+        self.assertEqual(release_stale_tasks(), 1)
+        for task, status in (
+            (stale, RecipeImageTask.PENDING),
+            (exhausted, RecipeImageTask.FAILED),
+            (active, RecipeImageTask.PROCESSING),
+        ):
+            task.refresh_from_db()
+            self.assertEqual(task.status, status)
+        self.assertIsNone(stale.claimed_at)
+        run_task(stale.pk)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, RecipeImageTask.DONE)
+        self.assertEqual(stale.attempts, 2)
+
+    def test_command_skips_delayed_tasks(self, build_renditions):
+        ready = self.create_task()
+        delayed = self.create_task(
+            available_at=timezone.now() + timedelta(hours=1)
+        )
+        stdout = StringIO()
+        call_command("process_image_tasks", once=True, stdout=stdout)
+        self.assertIn("Обработано задач: 1", stdout.getvalue())
+        ready.refresh_from_db()
+        delayed.refresh_from_db()
+        self.assertEqual(ready.status, RecipeImageTask.DONE)
+        self.assertEqual(delayed.status, RecipeImageTask.PENDING)
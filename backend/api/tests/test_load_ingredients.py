@@ -0,0 +1,122 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+
+from api.caching import get_version
+from api.tests.base import ApiTestCase
+from foodgram.models import Ingredient
+
+ROWS = [
+    ("абрикосовое варенье", "г"),
+    ("молоко", "мл"),
+    ("молоко", "г"),
+    ("соль, морская", "г"),
+    ('соус "Тартар"', "г"),
+]
+
+
+class LoadIngredientsTest(ApiTestCase):
+    """Потоковая загрузка ингредиентов из CSV и JSON, в том числе gzip."""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def csv_content(self, rows):
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerow(("name", "measurement_unit"))
+        writer.writerows(rows)
+        return output.getvalue()
+
+    def json_content(self, rows):
+        return json.dumps(
+            [
+                {"name": name, "measurement_unit": unit}
+                for name, unit in rows
+            ],
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    def load(self, path, **options):
+        stdout = StringIO()
+        call_command(
+            "load_ingredients_data", path, stdout=stdout, **options
+        )
+        return stdout.getvalue()
+
+    def loaded(self):
+        return set(
+            Ingredient.objects.values_list("name", "measurement_unit")
+        )
+
+    def test_formats(self):
+        files = {
+            "ingredients.csv": self.csv_content(ROWS),
+            "ingredients.csv.gz": self.csv_content(ROWS),
+            "ingredients.json": self.json_content(ROWS),
+            "ingredients.json.gz": self.json_content(ROWS),
+        }
+        for name, content in files.items():
+            with self.subTest(name=name):
+                Ingredient.objects.all().delete()
+                # Маленькие части проверяют объекты на границе чтения.
+                with mock.patch(
+                    "foodgram.management.commands.load_ingredients_data."
+                    "JSON_CHUNK_SIZE", 7
+                ):
+                    output = self.load(
+                        self.write(name, content), batch_size=2
+                    )
+                self.assertIn("Добавлено: 5, пропущено: 0", output)
+                self.assertEqual(self.loaded(), set(ROWS))
+
+    def test_idempotent(self):
+        path = self.write("ingredients.csv", self.csv_content(ROWS))
+        self.load(path)
+        version = get_version(Ingredient)
+        output = self.load(path, batch_size=2)
+        self.assertIn("Добавлено: 0, пропущено: 5", output)
+        self.assertEqual(Ingredient.objects.count(), len(ROWS))
+        # Без новых строк кеш справочника не сбрасывается.
+        self.assertEqual(get_version(Ingredient), version)
+
+    def test_partial_reload(self):
+        self.load(self.write("old.json", self.json_content(ROWS[:2])))
+        version = get_version(Ingredient)
+        output = self.load(
+            self.write("new.json", self.json_content(ROWS + ROWS[:1]))
+        )
+        self.assertIn("Добавлено: 3, пропущено: 3", output)
+        self.assertEqual(self.loaded(), set(ROWS))
+        self.assertNotEqual(get_version(Ingredient), version)
+
+    def test_format_option(self):
+        path = self.write("ingredients.txt", self.json_content(ROWS))
+        with self.assertRaises(CommandError):
+            self.load(path)
+        self.load(path, format="json")
+        self.assertEqual(self.loaded(), set(ROWS))
+
+    def test_errors(self):
+        broken = self.write("broken.json", self.json_content(ROWS)[:-10])
+        for path in (broken, os.path.join(self.directory, "missing.csv")):
+            with self.subTest(path=path):
+                with self.assertRaises(CommandError):
+                    self.load(path)
@@ -0,0 +1,72 @@
+from django.urls import reverse
+
+from api.membership import load_recipe_ids
+from api.tests.base import ApiTestCase
+from foodgram.models import Cart, Favorite, Recipe, User
+
+
+class MembershipCacheTest(ApiTestCase):
+    """Кеш избранного и корзины сбрасывается при любом изменении."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com",
+            username="user",
+            first_name="Имя",
+            last_name="Фамилия",
+            password="Ne-prostoi-parol-42",
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.user,
+                name=f"Рецепт {number}",
+                text="Описание",
+                image="recipe_images/recipe.png",
+                cooking_time=10,
+            )
+            for number in range(3)
+        ]
+
+    def assertCached(self, model, recipes):
+        self.assertEqual(
+            load_recipe_ids(self.user.pk, model),
+            {recipe.pk for recipe in recipes},
+        )
+
+    def test_api(self):
+        client = self.get_client(self.user)
+        recipe = self.recipes[0]
+        url = reverse("recipes-detail", args=[recipe.pk])
+        self.assertFalse(client.get(url).data["is_favorited"])
+        client.post(reverse("recipes-favorite", args=[recipe.pk]))
+        self.assertTrue(client.get(url).data["is_favorited"])
+        client.delete(reverse("recipes-favorite", args=[recipe.pk]))
+        self.assertFalse(client.get(url).data["is_favorited"])
+
+    def test_direct_changes(self):
+        first, second, third = self.recipes
+        for model in (Favorite, Cart):
+            with self.subTest(model=model.__name__):
+                self.assertCached(model, [])
+                # Так объекты создает и удаляет админка.
+                item = model.objects.create(user=self.user, recipe=first)
+                self.assertCached(model, [first])
+                item.delete()
+                self.assertCached(model, [])
+                for recipe in (second, third):
+                    model.objects.create(user=self.user, recipe=recipe)
+                self.assertCached(model, [second, third])
+                model.objects.filter(user=self.user, recipe=second).delete()
+                self.assertCached(model, [third])
+
+    def test_cascade(self):
+        first, second, _ = self.recipes
+        for model in (Favorite, Cart):
+            model.objects.create(user=self.user, recipe=first)
+            model.objects.create(user=self.user, recipe=second)
+            self.assertCached(model, [first, second])
+        first.delete()
+        for model in (Favorite, Cart):
+            with self.subTest(model=model.__name__):
+                self.assertCached(model, [second])
@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from api.metrics import registry
+from api.tests.base import ApiTestCase
+from foodgram.models import User
+
+
+class PerformanceMiddlewareTest(ApiTestCase):
+    """Учет запросов в метриках производительности."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com",
+            username="user",
+            first_name="Имя",
+            last_name="Фамилия",
+            password="Ne-prostoi-parol-42",
+        )
+
+    def test_streaming_body_is_recorded(self):
+        client = self.get_client(self.user)
+        with mock.patch.object(registry, "observe") as observe:
+            response = client.get(reverse("recipes-download_shopping_cart"))
+            self.assertTrue(response.streaming)
+            observe.assert_not_called()
+            b"".join(response.streaming_content)
+        observe.assert_called_once()
+        view_name, _, stats = observe.call_args[0]
+        self.assertEqual(view_name, "recipes-download_shopping_cart")
+        # Список покупок читается из базы при выдаче тела.
+        self.assertGreaterEqual(stats.queries, 1)
+
+    def test_regular_response_is_recorded(self):
+        with mock.patch.object(registry, "observe") as observe:
+            response = self.client.get(reverse("recipes-list"))
+        self.assertIn("Server-Timing", response)
+        observe.assert_called_once()
+        self.assertEqual(observe.call_args[0][0], "recipes-list")
+
+
+@override_settings(METRICS_ALLOWED_IPS=["10.0.0.5"])
+class MetricsAccessTest(ApiTestCase):
+    """Доступ к /api/metrics/ по адресу клиента."""
+
+    def test_remote_addr(self):
+        url = reverse("metrics")
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR="10.0.0.5").status_code, 200
+        )
+        self.assertEqual(
+            self.client.get(
+                url, REMOTE_ADDR="10.0.0.1", HTTP_X_REAL_IP="10.0.0.5"
+            ).status_code,
+            403,
+        )
+
+    @override_settings(METRICS_CLIENT_IP_HEADER="HTTP_X_REAL_IP")
+    def test_proxy_header(self):
+        url = reverse("metrics")
+        self.assertEqual(
+            self.client.get(
+                url, REMOTE_ADDR="10.0.0.1", HTTP_X_REAL_IP="10.0.0.5"
+            ).status_code,
+            200,
+        )
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR="10.0.0.5").status_code, 403
+        )
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+from api.tests.base import ApiTestCase
+from foodgram.models import Recipe, User
+
+LIMIT = 4
+
+
+class RecipeKeysetPaginationTest(ApiTestCase):
+    """Keyset-пагинация ленты совпадает с постраничной."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create_user(
+                email=f"author{number}@example.com",
+                username=f"author{number}",
+                first_name="Автор",
+                last_name="Рецептов",
+                password="Ne-prostoi-parol-42",
+            )
+            for number in range(2)
+        ]
+        now = timezone.now()
+        for number in range(15):
+            recipe = Recipe.objects.create(
+                author=cls.authors[number % 2],
+                name=f"Рецепт {number}",
+                text="Описание",
+                image="recipe_images/recipe.png",
+                cooking_time=10,
+            )
+            # По три рецепта с одинаковым временем создания: порядок
+            # внутри группы задает id.
+            Recipe.objects.filter(pk=recipe.pk).update(
+                created_at=now - timedelta(minutes=number // 3)
+            )
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def pages(self, **params):
+        """Все страницы постраничной пагинации."""
+        pages = []
+        url = reverse("recipes-list")
+        params = {"limit": LIMIT, **params}
+        while url:
+            data = self.get(url, params)
+            pages.append([recipe["id"] for recipe in data["results"]])
+            url, params = data["next"], None
+        return pages
+
+    def cursor_pages(self, **params):
+        """Все страницы keyset-пагинации и ответ последней страницы."""
+        pages = []
+        url = reverse("recipes-list")
+        params = {"limit": LIMIT, "pagination": "cursor", **params}
+        while url:
+            data = self.get(url, params)
+            self.assertNotIn("count", data)
+            pages.append([recipe["id"] for recipe in data["results"]])
+            url, params, last = data["next"], None, data
+        return pages, last
+
+    def test_same_pages(self):
+        for params in ({}, {"author": self.authors[0].pk}):
+            with self.subTest(params=params):
+                expected = self.pages(**params)
+                pages, _ = self.cursor_pages(**params)
+                self.assertEqual(pages, expected)
+
+    def test_previous_links(self):
+        expected = self.pages()
+        pages, last = self.cursor_pages()
+        previous = []
+        url = last["previous"]
+        while url:
+            data = self.get(url)
+            previous.append([recipe["id"] for recipe in data["results"]])
+            url = data["previous"]
+        self.assertEqual(previous, expected[-2::-1])
+
+    def test_order_matches_feed(self):
+        pages, _ = self.cursor_pages()
+        self.assertEqual(
+            [pk for page in pages for pk in page],
+            list(
+                Recipe.objects.order_by("-created_at", "-id")
+                .values_list("pk", flat=True)
+            ),
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            reverse("recipes-list"), {"pagination": "cursor", "cursor": "x"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_ordering_uses_page_numbers(self):
+        data = self.get(
+            reverse("recipes-list"),
+            {"pagination": "cursor", "ordering": "popular"},
+        )
+        self.assertEqual(data["count"], 15)
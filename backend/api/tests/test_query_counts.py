@@ -0,0 +1,209 @@
+import sys
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.serializers import Serializer
+
+from api.tests.base import DatasetTestCase, clear_caches
+from api.urls import router
+from foodgram.models import (
+    Ingredient, IngredientRecipe, Recipe, Subscription, Tag, User
+)
+
+SMALL = 1
+LARGE = 50
+OUTSIDE = "<вне сериализатора>"
+
+
+def serializer_field():
+    """
+    Находит поле сериализатора, из которого выполняется запрос.
+
+    Поднимается по стеку до ближайшего Serializer.to_representation
+    и берет из него текущее поле цикла.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_name == "to_representation":
+            owner = frame.f_locals.get("self")
+            field = frame.f_locals.get("field")
+            if isinstance(owner, Serializer) and field is not None:
+                return f"{type(owner).__name__}.{field.field_name}"
+        frame = frame.f_back
+    return OUTSIDE
+
+
+class FieldCounter:
+    """Обертка выполнения запросов, считающая их по полям сериализаторов."""
+
+    def __init__(self):
+        self.fields = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        self.fields[serializer_field()] += 1
+        return execute(sql, params, many, context)
+
+
+class RouterQueriesTest(DatasetTestCase):
+    """
+    Число запросов GET-действий роутера не растет с размером страницы.
+
+    Списки запрашиваются со страницами из SMALL и LARGE объектов,
+    детальные представления - для объектов с малым и большим
+    числом связанных записей. В отчете перечисляются поля
+    сериализаторов, число запросов из которых выросло.
+    """
+
+    dataset = {
+        "users": LARGE + 5,
+        "recipes": LARGE * 2,
+        "favorites_per_user": LARGE,
+        "carts_per_user": LARGE,
+        "subscriptions_per_user": LARGE,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = (
+            User.objects.annotate(subscriptions=Count("subscriber"))
+            .order_by("-subscriptions", "-pk").first()
+        )
+        small, large = Recipe.objects.order_by("-pk")[:2]
+        IngredientRecipe.objects.filter(recipe=small).exclude(
+            pk=small.ingredientrecipe_set.order_by("pk").values("pk")[:1]
+        ).delete()
+        used = large.ingredientrecipe_set.values("ingredient")
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(recipe=large, ingredient=ingredient, amount=1)
+            for ingredient in Ingredient.objects.exclude(pk__in=used)[
+                :LARGE - large.ingredientrecipe_set.count()
+            ]
+        )
+        tag = Tag.objects.order_by("pk").first()
+        cls.samples = {
+            "recipes": (small.pk, large.pk),
+            "tags": (tag.pk, tag.pk),
+            "ingredients": (
+                Ingredient.objects.order_by("pk").first().pk,
+                Ingredient.objects.order_by("-pk").first().pk,
+            ),
+        }
+
+    def get_requests(self):
+        """Пары адресов (малый, большой) для GET-действий роутера."""
+        for route in router.urls:
+            if "format" in route.pattern.regex.groupindex:
+                continue
+            if "get" not in getattr(route.callback, "actions", {}):
+                continue
+            name = route.name
+            if "pk" in route.pattern.regex.groupindex:
+                pks = self.samples[name.rsplit("-", 1)[0]]
+                yield name, [
+                    reverse(name, kwargs={"pk": pk}) for pk in pks
+                ]
+            else:
+                url = reverse(name)
+                yield name, [
+                    f"{url}?limit={size}&recipes_limit={size}"
+                    for size in (SMALL, LARGE)
+                ]
+
+    def measure(self, client, url):
+        # Промах всех кешей обязан укладываться в постоянное число
+        # запросов.
+        clear_caches()
+        counter = FieldCounter()
+        with CaptureQueriesContext(connection) as context:
+            with connection.execute_wrapper(counter):
+                response = client.get(url)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context), counter.fields
+
+    def test_query_count_does_not_grow(self):
+        client = self.get_client(self.user)
+        for name, (small_url, large_url) in self.get_requests():
+            with self.subTest(name):
+                small, small_fields = self.measure(client, small_url)
+                large, large_fields = self.measure(client, large_url)
+                grown = sorted(
+                    f"{field} ({small_fields[field]} -> {count})"
+                    for field, count in large_fields.items()
+                    if count > small_fields[field]
+                )
+                self.assertLessEqual(
+                    large, small,
+                    "Число запросов растет с размером страницы: "
+                    + ", ".join(grown),
+                )
+
+
+class RecipeListQueriesTest(DatasetTestCase):
+    """Число запросов ленты рецептов не зависит от размера страницы."""
+
+    dataset = {
+        "users": 3,
+        "recipes": LARGE,
+        "favorites_per_user": LARGE // 2,
+        "carts_per_user": LARGE // 2,
+    }
+
+    # Токен, COUNT, страница, авторы, теги, ингредиенты,
+    # избранное и корзина пользователя.
+    queries = 8
+
+    def test_query_count_is_fixed(self):
+        client = self.get_client(User.objects.order_by("pk").first())
+        url = reverse("recipes-list")
+        for size in (SMALL, LARGE):
+            with self.subTest(size=size):
+                clear_caches()
+                with self.assertNumQueries(self.queries):
+                    response = client.get(url, {"limit": size})
+                self.assertEqual(len(response.json()["results"]), size)
+
+
+class SubscriptionsQueriesTest(DatasetTestCase):
+    """Лента подписок пользователя, подписанного на 1000 авторов."""
+
+    authors = 1000
+    dataset = {
+        "users": authors + 1,
+        "recipes": (authors + 1) * 2,
+        "favorites_per_user": 0,
+        "carts_per_user": 0,
+        "subscriptions_per_user": 0,
+    }
+    # Токен, COUNT, подписки с авторами, рецепты авторов.
+    queries = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user, *authors = User.objects.order_by("pk")
+        Subscription.objects.bulk_create(
+            Subscription(user=cls.user, author=author) for author in authors
+        )
+
+    def test_query_count_is_fixed(self):
+        client = self.get_client(self.user)
+        url = reverse("users-subscriptions")
+        for size in (SMALL, self.authors):
+            with self.subTest(size=size):
+                clear_caches()
+                with self.assertNumQueries(self.queries):
+                    response = client.get(
+                        url, {"limit": size, "recipes_limit": 1}
+                    )
+                data = response.json()
+                self.assertEqual(data["count"], self.authors)
+                self.assertEqual(len(data["results"]), size)
+                for author in data["results"]:
+                    self.assertEqual(author["recipes_count"], 2)
+                    self.assertEqual(len(author["recipes"]), 1)
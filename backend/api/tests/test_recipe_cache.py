@@ -0,0 +1,39 @@
+from api.caching import get_version
+from api.tests.base import ApiTestCase
+from foodgram.models import Recipe, User
+
+
+class AuthorChangesTest(ApiTestCase):
+    """Кеш представлений рецептов сбрасывают только данные автора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Автор",
+            last_name="Рецептов",
+            password="Ne-prostoi-parol-42",
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.version = get_version(Recipe)
+
+    def test_password_change_keeps_cache(self):
+        self.user.set_password("Drugoi-parol-42")
+        self.user.save()
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(get_version(Recipe), self.version)
+
+    def test_author_change_resets_cache(self):
+        for field, value in (
+            ("first_name", "Новое имя"),
+            ("email", "new@example.com"),
+        ):
+            with self.subTest(field=field):
+                setattr(self.user, field, value)
+                self.user.save()
+                self.assertNotEqual(get_version(Recipe), self.version)
+                self.version = get_version(Recipe)
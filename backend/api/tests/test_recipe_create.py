@@ -0,0 +1,187 @@
+import base64
+from io import BytesIO
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from api.tests.base import DatasetTestCase, clear_caches
+from foodgram.models import Ingredient, Recipe, Tag, User, tag_bits
+from foodgram.search import supports_full_text
+
+FEW = 2
+MANY = 30
+
+
+def image_data():
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), (200, 120, 60)).save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class RecipeCreateQueriesTest(DatasetTestCase):
+    """Проверка ингредиентов и тегов рецепта не зависит от их числа."""
+
+    dataset = {"users": 1, "recipes": 0, "subscriptions_per_user": 0}
+    # Токен, теги, ингредиенты, SAVEPOINT, рецепт с маской тегов,
+    # счетчик автора, теги (текущие, существующие, вставка), ингредиенты,
+    # задача обработки изображения, RELEASE; ответ: теги, ингредиенты,
+    # избранное и корзина. На PostgreSQL еще поисковый вектор.
+    queries = 16
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = User.objects.get()
+        cls.tag_ids = list(Tag.objects.values_list("pk", flat=True))
+        cls.ingredient_ids = list(
+            Ingredient.objects.order_by("pk").values_list("pk", flat=True)
+        )
+
+    def get_payload(self, ingredient_ids, tag_ids):
+        return {
+            "name": "Рецепт",
+            "text": "Описание",
+            "cooking_time": 10,
+            "image": image_data(),
+            "tags": tag_ids,
+            "ingredients": [
+                {"id": pk, "amount": 1} for pk in ingredient_ids
+            ],
+        }
+
+    def test_query_count_is_fixed(self):
+        client = self.get_client(self.user)
+        queries = self.queries + supports_full_text(Recipe.objects.all())
+        for size in (FEW, MANY):
+            with self.subTest(size=size):
+                clear_caches()
+                payload = self.get_payload(
+                    self.ingredient_ids[:size], self.tag_ids
+                )
+                with self.assertNumQueries(queries):
+                    response = client.post(
+                        reverse("recipes-list"), payload, format="json"
+                    )
+                self.assertEqual(response.status_code, 201)
+                recipe = Recipe.objects.get(pk=response.json()["id"])
+                self.assertEqual(recipe.ingredientrecipe_set.count(), size)
+
+    def test_all_missing_ids_reported(self):
+        missing_ingredients = [max(self.ingredient_ids) + 1,
+                               max(self.ingredient_ids) + 2]
+        missing_tags = [max(self.tag_ids) + 1, max(self.tag_ids) + 2]
+        response = self.get_client(self.user).post(
+            reverse("recipes-list"),
+            self.get_payload(
+                self.ingredient_ids[:FEW] + missing_ingredients,
+                self.tag_ids[:1] + missing_tags,
+            ),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        for field, ids in (
+            ("ingredients", missing_ingredients),
+            ("tags", missing_tags),
+        ):
+            with self.subTest(field=field):
+                message = " ".join(errors[field])
+                for pk in ids:
+                    self.assertIn(str(pk), message)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_update_saves_recipe_once(self):
+        client = self.get_client(self.user)
+        response = client.post(
+            reverse("recipes-list"),
+            self.get_payload(self.ingredient_ids[:MANY], self.tag_ids[:2]),
+            format="json",
+        )
+        recipe = Recipe.objects.get(pk=response.json()["id"])
+        tag_ids = self.tag_ids[1:]
+        with CaptureQueriesContext(connection) as context:
+            response = client.patch(
+                reverse("recipes-detail", kwargs={"pk": recipe.pk}),
+                self.get_payload(self.ingredient_ids[FEW:MANY], tag_ids),
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        updates = [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith('UPDATE "foodgram_recipe"')
+            and "to_tsvector" not in query["sql"]
+        ]
+        self.assertEqual(len(updates), 1, updates)
+        updated = Recipe.objects.get(pk=recipe.pk)
+        self.assertGreater(updated.updated_at, recipe.updated_at)
+        self.assertEqual(updated.tags_mask, tag_bits(tag_ids))
+        self.assertEqual(
+            updated.ingredientrecipe_set.count(), MANY - FEW
+        )
+
+    def ingredient_writes(self, context):
+        return [
+            query["sql"].split()[0] for query in context.captured_queries
+            if '"foodgram_ingredientrecipe"' in query["sql"]
+            and not query["sql"].startswith("SELECT")
+        ]
+
+    def test_update_ingredients_diff(self):
+        client = self.get_client(self.user)
+        kept, changed, removed, added = self.ingredient_ids[:4]
+        payload = self.get_payload([kept, changed, removed], self.tag_ids)
+        response = client.post(
+            reverse("recipes-list"), payload, format="json"
+        )
+        recipe = Recipe.objects.get(pk=response.json()["id"])
+        before = {
+            item.ingredient_id: item.pk
+            for item in recipe.ingredientrecipe_set.all()
+        }
+        payload = self.get_payload([kept, changed, added], self.tag_ids)
+        payload["ingredients"][1]["amount"] = 5
+        with CaptureQueriesContext(connection) as context:
+            response = client.patch(
+                reverse("recipes-detail", kwargs={"pk": recipe.pk}),
+                payload,
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        # Одно удаление, одно изменение количества и одна вставка.
+        self.assertEqual(
+            sorted(self.ingredient_writes(context)),
+            ["DELETE", "INSERT", "UPDATE"],
+        )
+        after = {
+            item.ingredient_id: (item.pk, item.amount)
+            for item in recipe.ingredientrecipe_set.all()
+        }
+        self.assertEqual(after.keys(), {kept, changed, added})
+        self.assertEqual(after[kept], (before[kept], 1))
+        self.assertEqual(after[changed], (before[changed], 5))
+        self.assertEqual(after[added][1], 1)
+        self.assertEqual(
+            {item["id"]: item["amount"]
+             for item in response.json()["ingredients"]},
+            {kept: 1, changed: 5, added: 1},
+        )
+
+    def test_update_same_ingredients_writes_nothing(self):
+        client = self.get_client(self.user)
+        payload = self.get_payload(self.ingredient_ids[:FEW], self.tag_ids)
+        response = client.post(
+            reverse("recipes-list"), payload, format="json"
+        )
+        pk = response.json()["id"]
+        with CaptureQueriesContext(connection) as context:
+            response = client.patch(
+                reverse("recipes-detail", kwargs={"pk": pk}),
+                payload,
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ingredient_writes(context), [])
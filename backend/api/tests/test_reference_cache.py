@@ -0,0 +1,33 @@
+from django.urls import reverse
+
+from api.tests.base import ApiTestCase
+from foodgram.models import Tag
+
+
+class ReferenceCacheTest(ApiTestCase):
+    """Кеш справочников отдает JSON и не мешает другим форматам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name="Завтрак", color="#E26C2D", slug="breakfast")
+
+    def test_json_is_cached(self):
+        url = reverse("tags-list")
+        first = self.client.get(url, HTTP_ACCEPT="application/json")
+        with self.assertNumQueries(0):
+            second = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(second["Content-Type"], "application/json")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.json()[0]["slug"], "breakfast")
+        not_modified = self.client.get(
+            url, HTTP_IF_NONE_MATCH=second["ETag"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_browsable_api_bypasses_cache(self):
+        url = reverse("tags-list")
+        self.client.get(url, HTTP_ACCEPT="application/json")
+        response = self.client.get(url, HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+        self.assertContains(response, "breakfast")
@@ -0,0 +1,98 @@
+from contextlib import ExitStack
+from unittest import skipIf
+
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.tests.base import ApiTestCase
+from foodgram.models import Recipe, User
+
+
+# Зеркало общей базы SQLite в памяти не может читать таблицы,
+# заблокированные транзакцией теста в основном соединении.
+@skipIf(connection.vendor == "sqlite", "нужна база с изоляцией MVCC")
+@override_settings(DATABASE_REPLICAS=["replica_1"], REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTest(ApiTestCase):
+    """Выбор базы для запросов API при заданной реплике."""
+
+    databases = {"default", "replica_1"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = (
+            User.objects.create_user(
+                email=f"{username}@example.com",
+                username=username,
+                first_name="Имя",
+                last_name="Фамилия",
+                password="Ne-prostoi-parol-42",
+            )
+            for username in ("user", "other")
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.other,
+            name="Рецепт",
+            text="Описание",
+            image="recipe_images/recipe.png",
+            cooking_time=10,
+        )
+
+    def request(self, client, method, url):
+        """Выполняет запрос и возвращает SQL, ушедший в каждую базу."""
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(
+                    CaptureQueriesContext(connections[alias])
+                )
+                for alias in ("default", "replica_1")
+            }
+            response = getattr(client, method)(url)
+        self.assertLess(response.status_code, 500)
+        return {
+            alias: [query["sql"] for query in context.captured_queries]
+            for alias, context in captured.items()
+        }
+
+    def test_safe_reads_use_replica(self):
+        queries = self.request(self.client, "get", reverse("recipes-list"))
+        self.assertEqual(queries["default"], [])
+        self.assertTrue(queries["replica_1"])
+
+    def test_token_lookup_uses_default(self):
+        client = self.get_client(self.user)
+        queries = self.request(client, "get", reverse("recipes-list"))
+        self.assertTrue(
+            any("authtoken_token" in sql for sql in queries["default"])
+        )
+        self.assertFalse(
+            any("authtoken_token" in sql for sql in queries["replica_1"])
+        )
+        self.assertTrue(
+            any("foodgram_recipe" in sql for sql in queries["replica_1"])
+        )
+
+    def test_write_goes_to_default_and_sticks(self):
+        client = self.get_client(self.user)
+        queries = self.request(
+            client, "post",
+            reverse("recipes-favorite", args=[self.recipe.pk]),
+        )
+        self.assertTrue(
+            any(sql.startswith("INSERT") for sql in queries["default"])
+        )
+        self.assertEqual(queries["replica_1"], [])
+        # Автор записи некоторое время читает из основной базы...
+        queries = self.request(client, "get", reverse("recipes-list"))
+        self.assertEqual(queries["replica_1"], [])
+        self.assertTrue(
+            any("foodgram_recipe" in sql for sql in queries["default"])
+        )
+        # ...а другие клиенты - по-прежнему с реплики.
+        queries = self.request(
+            self.get_client(self.other), "get", reverse("recipes-list")
+        )
+        self.assertTrue(
+            any("foodgram_recipe" in sql for sql in queries["replica_1"])
+        )
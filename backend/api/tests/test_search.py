@@ -0,0 +1,59 @@
+from unittest import skipIf, skipUnless
+
+from django.db import connection
+from django.urls import reverse
+
+from api.tests.base import ApiTestCase
+from foodgram.models import Recipe, User
+
+POSTGRESQL = connection.vendor == "postgresql"
+
+
+class RecipeSearchTest(ApiTestCase):
+    """Поиск рецептов по названию и описанию (search)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Автор",
+            last_name="Рецептов",
+            password="Ne-prostoi-parol-42",
+        )
+        # Совпадение в названии создано раньше совпадения в описании,
+        # поэтому без учета релевантности шло бы вторым.
+        cls.in_name = cls.create_recipe("Борщ украинский", "Свекла и мясо")
+        cls.in_text = cls.create_recipe("Суп", "Почти как борщ, но без мяса")
+        cls.create_recipe("Салат", "Огурцы и помидоры")
+
+    @classmethod
+    def create_recipe(cls, name, text):
+        return Recipe.objects.create(
+            author=cls.user,
+            name=name,
+            text=text,
+            image="recipe_images/recipe.png",
+            cooking_time=10,
+        )
+
+    def search(self, value):
+        response = self.client.get(reverse("recipes-list"), {"search": value})
+        self.assertEqual(response.status_code, 200)
+        return [recipe["id"] for recipe in response.data["results"]]
+
+    @skipIf(POSTGRESQL, "поиск подстроки работает без PostgreSQL")
+    def test_fallback_ignores_case(self):
+        expected = {self.in_name.pk, self.in_text.pk}
+        for value in ("борщ", "БОРЩ", "Борщ"):
+            with self.subTest(value=value):
+                self.assertEqual(set(self.search(value)), expected)
+        self.assertEqual(len(self.search("ОГУРЦЫ")), 1)
+
+    @skipUnless(POSTGRESQL, "полнотекстовый поиск только в PostgreSQL")
+    def test_name_ranks_above_text(self):
+        for value in ("борщ", "БОРЩИ"):
+            with self.subTest(value=value):
+                self.assertEqual(
+                    self.search(value), [self.in_name.pk, self.in_text.pk]
+                )
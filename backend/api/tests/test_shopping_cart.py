@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+
+from django.urls import reverse
+
+from api.tests.base import ApiTestCase
+from foodgram.models import Cart, Ingredient, IngredientRecipe, Recipe, User
+
+
+class ShoppingListTest(ApiTestCase):
+    """Скачивание списка покупок в разных форматах."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com",
+            username="user",
+            first_name="Имя",
+            last_name="Фамилия",
+            password="Ne-prostoi-parol-42",
+        )
+        milk, flour, salt = (
+            Ingredient.objects.create(name=name, measurement_unit=unit)
+            for name, unit in (
+                ("молоко", "мл"), ("мука", "г"), ("соль, морская", "г")
+            )
+        )
+        for name, amounts in (
+            ("Блины", ((milk, 500), (flour, 200), (salt, 5))),
+            ("Оладьи", ((milk, 250), (flour, 150))),
+            ("Не в корзине", ((milk, 1000),)),
+        ):
+            recipe = Recipe.objects.create(
+                author=cls.user,
+                name=name,
+                text="Описание",
+                image="recipe_images/recipe.png",
+                cooking_time=10,
+            )
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=amount
+                )
+                for ingredient, amount in amounts
+            )
+            if name != "Не в корзине":
+                Cart.objects.create(user=cls.user, recipe=recipe)
+        cls.rows = [
+            {"name": "молоко", "measurement_unit": "мл", "amount": 750},
+            {"name": "мука", "measurement_unit": "г", "amount": 350},
+            {"name": "соль, морская", "measurement_unit": "г", "amount": 5},
+        ]
+
+    def download(self, **params):
+        return self.get_client(self.user).get(
+            reverse("recipes-download_shopping_cart"), params
+        )
+
+    def content(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_txt(self):
+        for params in ({}, {"file_format": "txt"}):
+            with self.subTest(params=params):
+                response = self.download(**params)
+                self.assertEqual(
+                    response["Content-Type"], "text/plain; charset=utf-8"
+                )
+                self.assertEqual(
+                    response["Content-Disposition"],
+                    "attachment; filename=shopping-list.txt",
+                )
+                self.assertEqual(
+                    self.content(response),
+                    "Список покупок:\n"
+                    "молоко: 750, мл\n"
+                    "мука: 350, г\n"
+                    "соль, морская: 5, г\n",
+                )
+
+    def test_csv(self):
+        response = self.download(file_format="csv")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual(
+            rows,
+            [
+                {key: str(value) for key, value in row.items()}
+                for row in self.rows
+            ],
+        )
+
+    def test_json(self):
+        response = self.download(file_format="json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(self.content(response)), self.rows)
+
+    def test_empty_cart(self):
+        Cart.objects.all().delete()
+        response = self.download(file_format="json")
+        self.assertEqual(json.loads(self.content(response)), [])
+
+    def test_unknown_format(self):
+        response = self.download(file_format="xml")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("xml", response.data["errors"])
+
+    def test_anonymous(self):
+        response = self.client.get(reverse("recipes-download_shopping_cart"))
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,125 @@
+from itertools import combinations
+
+from django.urls import reverse
+
+from api.tests.base import ApiTestCase
+from foodgram.constants import MAX_TAG_BIT
+from foodgram.models import Recipe, Tag, User, tag_bits
+
+
+class TagsMaskTest(ApiTestCase):
+    """
+    Маска tags_mask поддерживается при любом изменении связей
+    рецептов с тегами, и фильтр по ней совпадает с JOIN по тегам.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Автор",
+            last_name="Рецептов",
+            password="Ne-prostoi-parol-42",
+        )
+        cls.breakfast, cls.lunch, cls.dinner = (
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in (
+                ("Завтрак", "#E26C2D", "breakfast"),
+                ("Обед", "#49B64E", "lunch"),
+                ("Ужин", "#8775D2", "dinner"),
+            )
+        )
+        # Тег, id которого не помещается в маску.
+        cls.wide = Tag.objects.create(
+            id=MAX_TAG_BIT + 10, name="Перекус", color="#000000",
+            slug="snack",
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.user,
+                name=f"Рецепт {number}",
+                text="Описание",
+                image="recipe_images/recipe.png",
+                cooking_time=10,
+            )
+            for number in range(3)
+        ]
+
+    def assertMaskConsistent(self):
+        for recipe in Recipe.objects.prefetch_related("tags"):
+            self.assertEqual(
+                recipe.tags_mask,
+                tag_bits(tag.pk for tag in recipe.tags.all()),
+                recipe.name,
+            )
+        tags = list(Tag.objects.all())
+        for size in (1, 2):
+            for selected in combinations(tags, size):
+                with self.subTest(tags=[tag.slug for tag in selected]):
+                    self.assertEqual(
+                        set(
+                            Recipe.objects.with_any_tags(
+                                [tag.pk for tag in selected]
+                            ).values_list("pk", flat=True)
+                        ),
+                        set(
+                            Recipe.objects.filter(
+                                tags__slug__in=[tag.slug for tag in selected]
+                            ).values_list("pk", flat=True)
+                        ),
+                    )
+
+    def test_forward_actions(self):
+        first, second, _ = self.recipes
+        first.tags.add(self.breakfast, self.lunch, self.wide)
+        second.tags.add(self.dinner)
+        self.assertMaskConsistent()
+        first.tags.remove(self.lunch)
+        self.assertMaskConsistent()
+        first.tags.set([self.dinner])
+        self.assertMaskConsistent()
+        second.tags.clear()
+        self.assertMaskConsistent()
+
+    def test_reverse_actions(self):
+        first, second, third = self.recipes
+        self.breakfast.recipe_set.add(first, second)
+        self.lunch.recipe_set.add(second, third)
+        self.wide.recipe_set.add(third)
+        self.assertMaskConsistent()
+        self.breakfast.recipe_set.remove(second)
+        self.assertMaskConsistent()
+        self.lunch.recipe_set.clear()
+        self.assertMaskConsistent()
+        self.wide.recipe_set.clear()
+        self.assertMaskConsistent()
+
+    def test_saved_instance_keeps_mask(self):
+        first = self.recipes[0]
+        first.tags.add(self.lunch)
+        first.save()
+        self.assertMaskConsistent()
+
+    def test_tag_deletion(self):
+        first, second, _ = self.recipes
+        first.tags.add(self.breakfast, self.lunch)
+        second.tags.add(self.lunch, self.wide)
+        self.lunch.delete()
+        self.assertMaskConsistent()
+        self.wide.delete()
+        self.assertMaskConsistent()
+
+    def test_filter_with_wide_tag_id(self):
+        first, second, third = self.recipes
+        first.tags.add(self.wide)
+        second.tags.add(self.breakfast)
+        third.tags.add(self.lunch)
+        self.assertMaskConsistent()
+        response = self.client.get(
+            reverse("recipes-list"), {"tags": ["snack", "breakfast"]}
+        )
+        self.assertEqual(
+            {recipe["id"] for recipe in response.data["results"]},
+            {first.pk, second.pk},
+        )
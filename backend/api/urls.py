@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    SubscriptionsViewSet, IngredientViewSet, RecipeViewSet, TagViewSet
+    SubscriptionsViewSet, IngredientViewSet, RecipeViewSet, TagViewSet,
+    metrics
 )
 
 router = DefaultRouter()
@@ -12,6 +13,7 @@ router.register("ingredients", IngredientViewSet, basename="ingredients")
 router.register("recipes", RecipeViewSet, basename="recipes")
 
 urlpatterns = [
+    path("metrics/", metrics, name="metrics"),
     path("", include(router.urls)),
     path("", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
@@ -1,23 +1,28 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
+from django.http import (
+    HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, status, viewsets
+from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from api.permissions import IsAuthorOrReadOnly
 
 from foodgram.models import (
-    Cart, Favorite, Ingredient, IngredientRecipe,
-    Recipe, Subscription, Tag, User
+    Cart, Favorite, Ingredient, Recipe, Subscription, Tag, User
 )
-from api.filters import RecipeFilter
+from api.caching import ReferenceCacheMixin
+from api.filters import IngredientSearchFilter, RecipeFilter
+from api.metrics import registry
 from api.serializers import (
-    IngredientSerializer, RecipeCreateSerializer,
+    IngredientSerializer, RecipeCreateSerializer, RecipeListSerializer,
     ShortInfoRecipeSerializer, SubscriptionListSerializer,
     TagSerializer, SubscriptionSerializer
 )
-from api.paginations import PageLimitPagination
+from api.paginations import PageLimitPagination, RecipeKeysetPagination
+from api.shopping_cart import SHOPPING_LIST_FORMATS, get_shopping_list
 
 
 class SubscriptionsViewSet(viewsets.GenericViewSet):
@@ -35,13 +40,31 @@ class SubscriptionsViewSet(viewsets.GenericViewSet):
     )
     def subscriptions(self, request):
         user = self.request.user
-        queryset = user.subscriber.all()
+        queryset = user.subscriber.with_authors().order_by("id")
         page = self.paginate_queryset(queryset)
+        self.prefetch_recipes(page, request.query_params.get("recipes_limit"))
         serializer = SubscriptionListSerializer(
             page, many=True, context={"request": request}
         )
         return self.get_paginated_response(serializer.data)
 
+    def prefetch_recipes(self, subscriptions, recipes_limit):
+        """
+        Подгружает рецепты авторов страницы одним запросом,
+        не более recipes_limit на автора.
+        """
+        recipes = Recipe.objects.order_by("-created_at", "-id")
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes.limit_per_author(
+                int(recipes_limit),
+                [subscription.author_id for subscription in subscriptions],
+            )
+        prefetch_related_objects(
+            subscriptions,
+            Prefetch("author__recipes", queryset=recipes,
+                     to_attr="limited_recipes"),
+        )
+
     @action(
         detail=True,
         methods=["post", "delete"],
@@ -80,6 +103,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     Позволяет выполнять операции CRUD для рецептов.
     Так же предоставляет методы для добавления/удаления рецепта в избранное.
+    С параметром pagination=cursor лента отдается keyset-пагинацией,
+    если не заданы сортировка ordering и поиск search.
     """
 
     permission_classes = (IsAuthorOrReadOnly,)
@@ -87,8 +112,24 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    @property
+    def pagination_class(self):
+        params = self.request.query_params
+        if params.get("pagination") == "cursor" and not (
+            params.get("ordering") or params.get("search")
+        ):
+            return RecipeKeysetPagination
+        return PageLimitPagination
+
     def get_queryset(self):
-        return Recipe.objects.all().order_by('-created_at')
+        return (
+            Recipe.objects.order_by('-created_at', '-id')
+        )
+
+    def get_serializer_class(self):
+        if self.request.method in permissions.SAFE_METHODS:
+            return RecipeListSerializer
+        return RecipeCreateSerializer
 
     def add_method(self, model, user, name, pk):
         """Метод добавления/создания объекта."""
@@ -158,39 +199,35 @@ class RecipeViewSet(viewsets.ModelViewSet):
         url_name="download_shopping_cart",
     )
     def download_shopping_cart(self, request):
-        """Метод скачивания списка покупок."""
-        shopping_cart = Cart.objects.filter(user=self.request.user)
-        recipes = [item.recipe.id for item in shopping_cart]
-        buy = (
-            IngredientRecipe.objects.filter(recipe__in=recipes)
-            .values("ingredient")
-            .annotate(amount=Sum("amount"))
-        )
-        list_recipe = [
-            "Список покупок:",
-        ]
-        for item in buy:
-            ingredient = Ingredient.objects.get(pk=item["ingredient"])
-            amount = item["amount"]
-            list_recipe.append(
-                f"{ingredient.name}: {amount}, "
-                f"{ingredient.measurement_unit}"
-            )
-        purchased_in_file = "\n".join(list_recipe)
+        """
+        Метод скачивания списка покупок.
 
-        response = HttpResponse(purchased_in_file, content_type="text/plain")
+        Формат файла задается параметром file_format: txt, csv или json.
+        """
+        file_format = request.query_params.get("file_format", "txt")
+        if file_format not in SHOPPING_LIST_FORMATS:
+            return Response(
+                {"errors": f"Неизвестный формат файла: {file_format}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        content_type, render = SHOPPING_LIST_FORMATS[file_format]
+        shopping_list = get_shopping_list(request.user).iterator()
+        response = StreamingHttpResponse(
+            render(shopping_list), content_type=content_type
+        )
         response[
             "Content-Disposition"
-        ] = "attachment; filename=shopping-list.txt"
+        ] = f"attachment; filename=shopping-list.{file_format}"
 
         return response
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet для тегов.
 
     Позволяет выполнять операцию чтения для тегов.
+    Ответы кешируются до изменения тегов.
     """
 
     queryset = Tag.objects.all()
@@ -199,16 +236,38 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet для ингредиентов.
 
     Позволяет выполнять операцию чтения для ингредиентов.
     Дополнительно предоставляет возможность фильтрации списка ингредиентов.
+    Ответы кешируются до изменения ингредиентов.
     """
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (filters.SearchFilter, )
-    search_fields = ("^name", )
+    filter_backends = (IngredientSearchFilter, )
     pagination_class = None
+
+
+def client_ip(request):
+    """
+    Адрес клиента. За прокси REMOTE_ADDR - адрес прокси, поэтому
+    берется заголовок METRICS_CLIENT_IP_HEADER, если он задан.
+    """
+    if settings.METRICS_CLIENT_IP_HEADER:
+        return request.META.get(settings.METRICS_CLIENT_IP_HEADER)
+    return request.META.get("REMOTE_ADDR")
+
+
+def metrics(request):
+    """Метрики производительности процесса в формате Prometheus."""
+    if not (
+        client_ip(request) in settings.METRICS_ALLOWED_IPS
+        or request.user.is_staff
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4"
+    )
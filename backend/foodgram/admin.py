@@ -2,7 +2,7 @@ from django.contrib import admin
 
 from .forms import IngredientRecipeFormSet
 from .models import (Favorite, Ingredient, IngredientRecipe, Recipe,
-                     Subscription, Tag, User)
+                     RecipeImageTask, RecipeScore, Subscription, Tag, User)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -19,16 +19,31 @@ class IngredientRecipeInline(admin.TabularInline):
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author_name', 'quantity_favorite')
     list_filter = ('tags__name',)
+    list_select_related = ('author',)
     search_fields = ('author_name', 'name')
     inlines = (IngredientRecipeInline,)
 
     def quantity_favorite(self, obj):
-        return obj.favorites_recipe.count()
+        return obj.favorites_count
 
     def author_name(self, obj):
         return obj.author.username
 
 
+class RecipeScoreAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'popularity', 'trending', 'updated_at')
+    list_select_related = ('recipe',)
+
+
+class RecipeImageTaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipe', 'status', 'attempts', 'created_at', 'available_at',
+        'claimed_at',
+    )
+    list_filter = ('status',)
+    list_select_related = ('recipe',)
+
+
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
     search_fields = ('name',)
@@ -40,3 +55,5 @@ admin.site.register(Tag)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Favorite)
 admin.site.register(Subscription)
+admin.site.register(RecipeScore, RecipeScoreAdmin)
+admin.site.register(RecipeImageTask, RecipeImageTaskAdmin)
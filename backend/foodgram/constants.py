@@ -6,4 +6,19 @@ RECIPES_LIMIT = 2
 NAME_REGEX = r"^[a-zA-Zа-яА-Я\s]+$"
 COLOR_REGEX = r"^#[a-fA-F0-9]{3,6}$"
 MAX_LENGTH_COLOR = 7
+MAX_LENGTH_STATUS = 16
 RECIPES_LIMIT = 2
+TRENDING_WINDOW_DAYS = 14
+TRENDING_HALF_LIFE_HOURS = 48
+SCORES_BATCH_SIZE = 1000
+# Старший бит BigIntegerField знаковый, поэтому в маске тегов биты 0-62.
+MAX_TAG_BIT = 62
+IMAGE_RENDITIONS = {
+    "thumbnail": (160, 160),
+    "card": (480, 480),
+}
+IMAGE_FORMATS = ("webp", "jpeg")
+IMAGE_QUALITY = 80
+IMAGE_TASK_MAX_ATTEMPTS = 3
+# Пауза перед повтором после ошибки, секунды; удваивается с каждой попыткой.
+IMAGE_TASK_RETRY_DELAY = 60
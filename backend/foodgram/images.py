@@ -0,0 +1,150 @@
+"""Фоновая подготовка уменьшенных копий изображений рецептов."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .constants import (IMAGE_FORMATS, IMAGE_QUALITY, IMAGE_RENDITIONS,
+                        IMAGE_TASK_MAX_ATTEMPTS, IMAGE_TASK_RETRY_DELAY)
+from .models import RecipeImageTask
+
+PIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PIPELINE_WORKERS,
+            thread_name_prefix="recipe-images",
+        )
+    return _executor
+
+
+def resize(image, name, size):
+    """Миниатюра обрезается до квадрата, карточка сохраняет пропорции."""
+    if name == "thumbnail":
+        return ImageOps.fit(image, size, Image.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail(size, Image.LANCZOS)
+    return resized
+
+
+def build_renditions(recipe):
+    """Создает уменьшенные копии изображения рецепта во всех форматах."""
+    with recipe.image.open("rb") as file:
+        image = Image.open(file)
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    renditions = {}
+    for name, size in IMAGE_RENDITIONS.items():
+        resized = resize(image, name, size)
+        renditions[name] = {}
+        for image_format in IMAGE_FORMATS:
+            buffer = BytesIO()
+            resized.save(
+                buffer, format=PIL_FORMATS[image_format],
+                quality=IMAGE_QUALITY,
+            )
+            path = (
+                f"recipe_images/renditions/{recipe.pk}/{name}.{image_format}"
+            )
+            default_storage.delete(path)
+            renditions[name][image_format] = default_storage.save(
+                path, ContentFile(buffer.getvalue())
+            )
+    recipe.renditions = renditions
+    recipe.save(update_fields=["renditions", "updated_at"])
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой: 1, 2, 4... интервала повтора."""
+    return timedelta(seconds=IMAGE_TASK_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_task(task_id):
+    """
+    Выполняет задачу очереди.
+
+    Задача захватывается условным UPDATE, поэтому один и тот же id
+    безопасно передавать нескольким обработчикам. После ошибки задача
+    возвращается в очередь с растущей паузой, а после
+    IMAGE_TASK_MAX_ATTEMPTS попыток получает статус FAILED.
+    """
+    now = timezone.now()
+    claimed = RecipeImageTask.objects.filter(
+        pk=task_id, status=RecipeImageTask.PENDING, available_at__lte=now
+    ).update(
+        status=RecipeImageTask.PROCESSING,
+        attempts=F("attempts") + 1,
+        claimed_at=now,
+    )
+    if not claimed:
+        return
+    task = RecipeImageTask.objects.select_related("recipe").get(pk=task_id)
+    try:
+        build_renditions(task.recipe)
+    except Exception as e:
+        if task.attempts < IMAGE_TASK_MAX_ATTEMPTS:
+            task.status = RecipeImageTask.PENDING
+            task.available_at = timezone.now() + retry_delay(task.attempts)
+        else:
+            task.status = RecipeImageTask.FAILED
+        task.error = str(e)
+    else:
+        task.status = RecipeImageTask.DONE
+        task.error = ""
+    task.claimed_at = None
+    task.save(update_fields=["status", "error", "available_at", "claimed_at"])
+
+
+def release_stale_tasks():
+    """
+    Возвращает в очередь задачи, захваченные дольше
+    IMAGE_TASK_CLAIM_TIMEOUT секунд назад: их обработчик завершился,
+    не записав результат. Задачи, исчерпавшие попытки, получают
+    статус FAILED. Возвращает число освобожденных задач.
+    """
+    stale = RecipeImageTask.objects.filter(
+        status=RecipeImageTask.PROCESSING,
+        claimed_at__lt=timezone.now() - timedelta(
+            seconds=settings.IMAGE_TASK_CLAIM_TIMEOUT
+        ),
+    )
+    error = "Обработчик не завершил задачу вовремя"
+    stale.filter(attempts__gte=IMAGE_TASK_MAX_ATTEMPTS).update(
+        status=RecipeImageTask.FAILED, claimed_at=None, error=error
+    )
+    return stale.update(
+        status=RecipeImageTask.PENDING, claimed_at=None, error=error
+    )
+
+
+def run_task_in_thread(task_id):
+    try:
+        run_task(task_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_renditions(recipe):
+    """
+    Ставит изображение рецепта в очередь на обработку.
+
+    С IMAGE_PIPELINE_BACKEND="db" задачи выполняет команда
+    process_image_tasks, с "thread" - пул потоков текущего процесса.
+    """
+    task = RecipeImageTask.objects.create(recipe=recipe)
+    if settings.IMAGE_PIPELINE_BACKEND == "thread":
+        transaction.on_commit(
+            lambda: get_executor().submit(run_task_in_thread, task.pk)
+        )
+    return task
@@ -0,0 +1,194 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from PIL import Image
+
+from foodgram.models import (Cart, Favorite, Ingredient, IngredientRecipe,
+                             Recipe, Subscription, Tag, User)
+
+DATASET_IMAGE = 'recipe_images/dataset.png'
+DATASET_PERIOD = 30 * 24 * 3600
+DATASET_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических данных для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=6)
+        parser.add_argument('--tags-per-recipe', type=int, default=2)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--carts-per-user', type=int, default=5)
+        parser.add_argument('--subscriptions-per-user', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Зерно генератора для воспроизводимых данных.'
+        )
+
+    def bulk_create(self, model, objects):
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(batch)
+
+    def prepare_reference_data(self):
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients_data', stdout=self.stdout)
+        for name, color, slug in DATASET_TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': name, 'color': color}
+            )
+        if not default_storage.exists(DATASET_IMAGE):
+            buffer = BytesIO()
+            Image.new('RGB', (480, 480), (200, 120, 60)).save(buffer, 'PNG')
+            default_storage.save(DATASET_IMAGE, ContentFile(buffer.getvalue()))
+
+    def create_users(self, count, prefix):
+        password = make_password('dataset')
+        self.bulk_create(User, (
+            User(
+                username=f'{prefix}{number}',
+                email=f'{prefix}{number}@example.com',
+                first_name='Тест',
+                last_name='Пользователь',
+                password=password,
+            )
+            for number in range(count)
+        ))
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def create_recipes(self, count, user_ids, options):
+        self.bulk_create(Recipe, (
+            Recipe(
+                author_id=user_ids[number % len(user_ids)],
+                name=f'Рецепт номер {number}',
+                text='Синтетический рецепт для нагрузочного тестирования.',
+                image=DATASET_IMAGE,
+                cooking_time=self.random.randint(5, 120),
+            )
+            for number in range(count)
+        ))
+        recipe_ids = list(
+            Recipe.objects.filter(author_id__in=user_ids)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        # bulk_create ставит всем рецептам текущее время: разносим
+        # их по месяцу для сортировок по дате и трендам.
+        now = timezone.now()
+        recipes = []
+        for recipe_id in recipe_ids:
+            created_at = now - timedelta(
+                seconds=self.random.randint(0, DATASET_PERIOD)
+            )
+            recipes.append(Recipe(
+                id=recipe_id, created_at=created_at, updated_at=created_at
+            ))
+        for batch in batched(recipes, self.batch_size):
+            Recipe.objects.bulk_update(batch, ['created_at', 'updated_at'])
+        ingredient_ids = list(Ingredient.objects.values_list('pk', flat=True))
+        tag_ids = list(Tag.objects.values_list('pk', flat=True))
+        per_recipe = min(options['ingredients_per_recipe'],
+                         len(ingredient_ids))
+        tags_per_recipe = min(options['tags_per_recipe'], len(tag_ids))
+        self.bulk_create(IngredientRecipe, (
+            IngredientRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=self.random.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in self.random.sample(ingredient_ids,
+                                                    per_recipe)
+        ))
+        self.bulk_create(Recipe.tags.through, (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in self.random.sample(tag_ids, tags_per_recipe)
+        ))
+        return recipe_ids
+
+    def create_relations(self, model, user_ids, target_ids, per_user,
+                         field, dated=False, exclude_self=False):
+        """Связывает каждого пользователя со случайными объектами."""
+        now = timezone.now()
+
+        def relations():
+            for user_id in user_ids:
+                sample = self.random.sample(
+                    target_ids, min(per_user + 1, len(target_ids))
+                )
+                if exclude_self:
+                    sample = [pk for pk in sample if pk != user_id]
+                for target_id in sample[:per_user]:
+                    extra = {}
+                    if dated:
+                        # Разносим добавления по месяцу для оценки трендов.
+                        extra['created_at'] = now - timedelta(
+                            seconds=self.random.randint(0, DATASET_PERIOD)
+                        )
+                    yield model(user_id=user_id, **{field: target_id},
+                                **extra)
+
+        self.bulk_create(model, relations())
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Префикс берется из генератора: с --seed набор повторяется.
+        prefix = f'dataset_{self.random.getrandbits(32):08x}_'
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f'Набор с префиксом {prefix} уже создан: '
+                'укажите другой --seed.'
+            )
+
+        self.prepare_reference_data()
+        user_ids = self.create_users(options['users'], prefix)
+        recipe_ids = self.create_recipes(options['recipes'], user_ids,
+                                         options)
+        self.create_relations(Favorite, user_ids, recipe_ids,
+                              options['favorites_per_user'], 'recipe_id',
+                              dated=True)
+        self.create_relations(Cart, user_ids, recipe_ids,
+                              options['carts_per_user'], 'recipe_id',
+                              dated=True)
+        self.create_relations(Subscription, user_ids, user_ids,
+                              options['subscriptions_per_user'], 'author_id',
+                              exclude_self=True)
+
+        # bulk_create не вызывает сигналы: пересчитываем производные данные.
+        call_command('recount_counters', stdout=self.stdout)
+        call_command('update_search_vectors', stdout=self.stdout)
+        call_command('update_recipe_scores', stdout=self.stdout)
+        self.stdout.write(
+            f'Создано пользователей: {len(user_ids)}, '
+            f'рецептов: {len(recipe_ids)}. '
+            f'Префикс пользователей: {prefix}, пароль: dataset'
+        )
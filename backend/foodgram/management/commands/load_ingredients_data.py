@@ -1,30 +1,141 @@
 import csv
+import gzip
+import json
 import os
+import time
+from itertools import islice
 
 from django.core.management.base import BaseCommand, CommandError
 
+from api.caching import bump_version
 from foodgram.models import Ingredient
 from foodgram_backend.settings import CSV_FILES_DIR
 
+CSV_HEADER = ['name', 'measurement_unit']
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def open_file(path):
+    """Открывает файл на чтение, распаковывая gzip на лету."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def read_csv(file):
+    """Построчно читает пары (название, единица измерения) из CSV."""
+    for row in csv.reader(file):
+        if not row or row == CSV_HEADER:
+            continue
+        name, measurement_unit = row
+        yield name, measurement_unit
+
+
+def read_json(file):
+    """
+    Читает пары (название, единица измерения) из JSON-массива объектов.
+
+    Файл читается частями, в памяти держится только недочитанный хвост.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    for chunk in iter(lambda: file.read(JSON_CHUNK_SIZE), ''):
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in '[, \t\r\n':
+                position += 1
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield item['name'], item['measurement_unit']
+        buffer = buffer[position:]
+    if buffer.strip(' \t\r\n]'):
+        raise CommandError('Некорректный JSON в конце файла.')
+
+
+READERS = {'csv': read_csv, 'json': read_json}
+
 
 class Command(BaseCommand):
     help = 'Загрузка ингредиентов в базу данных'
 
-    def handle(self, *args, **kwargs):
-        csv_file_path = os.path.join(CSV_FILES_DIR, 'ingredients.csv')
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(CSV_FILES_DIR, 'ingredients.csv'),
+            help='Путь к файлу CSV или JSON, в том числе сжатому gzip.'
+        )
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='Формат файла; по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк записывать за один запрос.'
+        )
+
+    def get_format(self, path, file_format):
+        if file_format:
+            return file_format
+        extension = path.removesuffix('.gz').rsplit('.', 1)[-1].lower()
+        if extension not in READERS:
+            raise CommandError(
+                f"Не удалось определить формат файла '{path}', "
+                'укажите --format.'
+            )
+        return extension
+
+    def load_batch(self, batch):
+        """
+        Добавляет новые ингредиенты пачки.
+
+        Возвращает количество добавленных и пропущенных строк.
+        """
+        rows = set(batch)
+        existing = set(
+            Ingredient.objects.filter(
+                name__in={name for name, _ in rows}
+            ).values_list('name', 'measurement_unit')
+        )
+        new_rows = rows - existing
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in new_rows
+            ),
+            ignore_conflicts=True,
+        )
+        return len(new_rows), len(batch) - len(new_rows)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = READERS[self.get_format(path, options['format'])]
+        inserted = skipped = 0
+        started = time.monotonic()
         try:
-            with open(csv_file_path, encoding='utf-8') as file:
-                reader = csv.reader(file)
-                next(reader)
-                ingredients = [
-                    Ingredient(
-                        name=name,
-                        measurement_unit=measurement_unit,
-                    )
-                    for name, measurement_unit in reader
-                ]
-                Ingredient.objects.bulk_create(ingredients)
+            with open_file(path) as file:
+                rows = reader(file)
+                while True:
+                    batch = list(islice(rows, options['batch_size']))
+                    if not batch:
+                        break
+                    batch_inserted, batch_skipped = self.load_batch(batch)
+                    inserted += batch_inserted
+                    skipped += batch_skipped
         except FileNotFoundError:
-            raise CommandError(f"File '{csv_file_path}' not found.")
+            raise CommandError(f"File '{path}' not found.")
+        except CommandError:
+            raise
         except Exception as e:
             raise CommandError(f"An error occurred: {e}")
+        finally:
+            if inserted:
+                bump_version(Ingredient)
+        elapsed = time.monotonic() - started
+        total = inserted + skipped
+        self.stdout.write(
+            f'Добавлено: {inserted}, пропущено: {skipped}, '
+            f'строк в секунду: {total / elapsed if elapsed else total:.0f}'
+        )
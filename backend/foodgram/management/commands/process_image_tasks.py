@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from foodgram.images import release_stale_tasks, run_task
+from foodgram.models import RecipeImageTask
+
+
+class Command(BaseCommand):
+    help = 'Обработка очереди изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать текущую очередь и завершиться.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Сколько задач выбирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=2.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            release_stale_tasks()
+            task_ids = list(
+                RecipeImageTask.objects.filter(
+                    status=RecipeImageTask.PENDING,
+                    available_at__lte=timezone.now(),
+                ).order_by('available_at').values_list(
+                    'pk', flat=True
+                )[:options['batch_size']]
+            )
+            for task_id in task_ids:
+                run_task(task_id)
+            processed += len(task_ids)
+            if not task_ids:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        self.stdout.write(f'Обработано задач: {processed}')
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import (
+    BigIntegerField, Count, ExpressionWrapper, F, IntegerField, OuterRef,
+    Subquery, Sum, Value
+)
+from django.db.models.functions import Cast, Coalesce
+
+from foodgram.constants import MAX_TAG_BIT
+from foodgram.models import Cart, Favorite, Recipe, User
+
+
+def count_subquery(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на объект."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def tags_mask_subquery():
+    """
+    Подзапрос с маской тегов рецепта. Теги рецепта различны, поэтому
+    сумма битов 1 << tag_id совпадает с их побитовым ИЛИ.
+    """
+    bit = ExpressionWrapper(
+        Cast(Value(1), BigIntegerField()).bitleftshift(
+            Cast("tag_id", IntegerField())
+        ),
+        output_field=BigIntegerField(),
+    )
+    return Coalesce(
+        Subquery(
+            Recipe.tags.through.objects.filter(
+                recipe=OuterRef("pk"), tag_id__lte=MAX_TAG_BIT
+            )
+            .order_by()
+            .values("recipe")
+            .annotate(mask=Sum(bit))
+            .values("mask"),
+            output_field=BigIntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет счетчиков избранного, корзины, рецептов авторов '
+        'и масок тегов рецептов'
+    )
+
+    @transaction.atomic
+    def handle(self, *args, **kwargs):
+        favorites = count_subquery(Favorite, "recipe")
+        carts = count_subquery(Cart, "recipe")
+        tags_masks = tags_mask_subquery()
+        recipes = count_subquery(Recipe, "author")
+
+        fixed_recipes = (
+            Recipe.objects.annotate(actual_favorites=favorites,
+                                    actual_carts=carts,
+                                    actual_tags_mask=tags_masks)
+            .exclude(favorites_count=F("actual_favorites"),
+                     cart_count=F("actual_carts"),
+                     tags_mask=F("actual_tags_mask"))
+            .update(favorites_count=favorites, cart_count=carts,
+                    tags_mask=tags_masks)
+        )
+        fixed_users = (
+            User.objects.annotate(actual_recipes=recipes)
+            .exclude(recipes_count=F("actual_recipes"))
+            .update(recipes_count=recipes)
+        )
+        self.stdout.write(
+            f'Исправлено рецептов: {fixed_recipes}, '
+            f'пользователей: {fixed_users}'
+        )
@@ -0,0 +1,67 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from foodgram.constants import (SCORES_BATCH_SIZE, TRENDING_HALF_LIFE_HOURS,
+                                TRENDING_WINDOW_DAYS)
+from foodgram.models import Cart, Favorite, Recipe, RecipeScore
+
+
+class Command(BaseCommand):
+    help = 'Пересчет оценок популярности рецептов для сортировки ленты'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window-days', type=int, default=TRENDING_WINDOW_DAYS,
+            help='За сколько последних дней учитывать добавления.'
+        )
+        parser.add_argument(
+            '--half-life-hours', type=float,
+            default=TRENDING_HALF_LIFE_HOURS,
+            help='Через сколько часов вклад добавления уменьшается вдвое.'
+        )
+
+    def get_trending(self, now, window_days, half_life_hours):
+        """Суммирует недавние добавления с затуханием по давности."""
+        since = now - timedelta(days=window_days)
+        decay = math.log(2) / (half_life_hours * 3600)
+        trending = defaultdict(float)
+        for model in (Favorite, Cart):
+            added = model.objects.filter(created_at__gte=since).values_list(
+                'recipe_id', 'created_at'
+            )
+            for recipe_id, created_at in added.iterator():
+                age = (now - created_at).total_seconds()
+                trending[recipe_id] += math.exp(-decay * age)
+        return trending
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        trending = self.get_trending(
+            now, options['window_days'], options['half_life_hours']
+        )
+        scores = (
+            RecipeScore(
+                recipe_id=pk,
+                popularity=favorites_count + cart_count,
+                trending=trending.get(pk, 0.0),
+            )
+            for pk, favorites_count, cart_count in Recipe.objects.values_list(
+                'pk', 'favorites_count', 'cart_count'
+            ).iterator()
+        )
+        total = 0
+        with transaction.atomic():
+            RecipeScore.objects.all().delete()
+            while True:
+                batch = list(islice(scores, SCORES_BATCH_SIZE))
+                if not batch:
+                    break
+                RecipeScore.objects.bulk_create(batch)
+                total += len(batch)
+        self.stdout.write(f'Пересчитано оценок: {total}')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from foodgram.models import Recipe
+from foodgram.search import update_search_vector
+
+
+class Command(BaseCommand):
+    help = 'Пересчет поисковых векторов рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать все рецепты, а не только без вектора.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.all()
+        if not options['all']:
+            recipes = recipes.filter(search_vector__isnull=True)
+        updated = update_search_vector(recipes)
+        self.stdout.write(f'Обновлено рецептов: {updated}')
@@ -1,14 +1,45 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.expressions import RawSQL, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 
 from .constants import (MAX_LENGTH_EMAIL, MAX_LENGTH_NAME, MAX_LENGTH_SLUG,
-                        MAX_LENGTH_USERNAME, MAX_LENGTH_COLOR)
+                        MAX_LENGTH_USERNAME, MAX_LENGTH_COLOR,
+                        MAX_LENGTH_STATUS, MAX_TAG_BIT)
+from .search import SearchVectorIndex
 from .validators import validate_hex_color, FIELD_VALIDATOR
 
 
-class User(AbstractUser):
+class CountersMixin:
+    """
+    Не дает полному save() перезаписать счетчики counter_fields.
+
+    Счетчики меняются атомарными UPDATE с F() в сигналах, поэтому
+    значение в загруженном объекте может быть устаревшим. Если
+    update_fields не передан, UPDATE существующей строки не включает
+    счетчики; сохранить их можно только явно через update_fields.
+    Если строки уже нет, объект, как обычно, вставляется целиком.
+    """
+
+    counter_fields = ()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        if update_fields is None:
+            values = [
+                value for value in values
+                if value[0].attname not in self.counter_fields
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+
+
+class User(CountersMixin, AbstractUser):
     """
     Пользовательская модель пользователя, расширяющая AbstractUser Django.
 
@@ -17,9 +48,11 @@ class User(AbstractUser):
         first_name (str): Имя пользователя.
         last_name (str): Фамилия пользователя.
         email (str): Email адрес пользователя.
+        recipes_count (int): Количество рецептов пользователя.
     """
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name", "username"]
+    counter_fields = ("recipes_count",)
 
     username = models.CharField(
         verbose_name="Логин",
@@ -44,6 +77,11 @@ class User(AbstractUser):
         max_length=MAX_LENGTH_EMAIL,
         unique=True
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name="Количество рецептов",
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = "Пользователь"
@@ -113,7 +151,88 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+def recipe_prefetches():
+    """Связи рецепта, которые нужны для его вывода."""
+    return (
+        "tags",
+        models.Prefetch(
+            "ingredientrecipe_set",
+            queryset=IngredientRecipe.objects.select_related("ingredient"),
+        ),
+    )
+
+
+def tag_bits(tag_ids):
+    """
+    Битовая маска тегов для Recipe.tags_mask: тегу соответствует бит
+    с номером, равным его id. Теги с id больше MAX_TAG_BIT не входят.
+    """
+    return sum(1 << tag_id for tag_id in set(tag_ids) if tag_id <= MAX_TAG_BIT)
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов для рецептов."""
+
+    def touch(self, **fields):
+        """
+        Обновляет время изменения рецептов и поля fields,
+        не вызывая сигналов.
+        """
+        return self.update(updated_at=timezone.now(), **fields)
+
+    def with_any_tags(self, tag_ids):
+        """
+        Рецепты хотя бы с одним из тегов tag_ids.
+
+        Проверяется одно побитовое условие по tags_mask, без JOIN
+        и DISTINCT. Если id какого-то тега не помещается в маску,
+        связи с тегами проверяются подзапросом EXISTS.
+        """
+        if all(tag_id <= MAX_TAG_BIT for tag_id in tag_ids):
+            mask = models.Value(
+                tag_bits(tag_ids), output_field=models.BigIntegerField()
+            )
+            return self.alias(
+                matched_tags=models.F("tags_mask").bitand(mask)
+            ).filter(matched_tags__gt=0)
+        return self.filter(models.Exists(
+            Recipe.tags.through.objects.filter(
+                recipe=models.OuterRef("pk"), tag__in=tag_ids
+            )
+        ))
+
+    def limit_per_author(self, limit, authors):
+        """
+        Оставляет не более limit последних рецептов каждого автора.
+
+        Рецепты нумеруются оконной функцией ROW_NUMBER в разрезе автора,
+        поэтому выборка для всех авторов выполняется одним запросом.
+        """
+        ranked = (
+            Recipe.objects.filter(author__in=authors)
+            .annotate(
+                recipe_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[models.F("author_id")],
+                    order_by=[
+                        models.F("created_at").desc(),
+                        models.F("id").desc(),
+                    ],
+                )
+            )
+            .values("pk", "recipe_rank")
+        )
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(
+            pk__in=RawSQL(
+                f"SELECT ranked.id FROM ({sql}) AS ranked "
+                "WHERE ranked.recipe_rank <= %s",
+                (*params, limit),
+            )
+        )
+
+
+class Recipe(CountersMixin, models.Model):
     """
     Модель представляющая рецепт.
 
@@ -125,6 +244,16 @@ class Recipe(models.Model):
         ingredients (ManyToManyField): Ингредиенты рецепта.
         tags (ManyToManyField): Теги рецепта.
         cooking_time (int): Время приготовления рецепта в минутах.
+        favorites_count (int): Сколько раз рецепт добавлен в избранное.
+        cart_count (int): Сколько раз рецепт добавлен в список покупок.
+        search_vector (SearchVectorField): Поисковый вектор
+            по названию и описанию.
+        renditions (dict): Пути к уменьшенным копиям изображения
+            по размерам и форматам.
+        updated_at (datetime): Время последнего изменения рецепта,
+            его тегов или ингредиентов.
+        tags_mask (int): Битовая маска id тегов рецепта (см. tag_bits),
+            поддерживается сигналами.
     """
 
     author = models.ForeignKey(
@@ -141,15 +270,91 @@ class Recipe(models.Model):
         validators=[MinValueValidator(1)]
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    favorites_count = models.PositiveIntegerField(default=0, editable=False)
+    cart_count = models.PositiveIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    renditions = models.JSONField(default=dict, editable=False)
+    tags_mask = models.BigIntegerField(default=0, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
+    counter_fields = ("favorites_count", "cart_count")
 
     class Meta:
         verbose_name = "рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="recipe_created_at_id_idx",
+            ),
+            # Рецепты автора в порядке ленты без сортировки.
+            models.Index(
+                fields=["author", "-created_at", "-id"],
+                name="recipe_author_created_at_idx",
+            ),
+            SearchVectorIndex(
+                fields=["search_vector"], name="recipe_search_vector_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeImageTask(models.Model):
+    """
+    Задача очереди на подготовку уменьшенных копий изображения рецепта.
+
+    Атрибуты:
+        recipe (Recipe): Рецепт, изображение которого нужно обработать.
+        status (str): Состояние задачи.
+        attempts (int): Количество попыток обработки.
+        error (str): Текст последней ошибки.
+        created_at (datetime): Дата постановки в очередь.
+        available_at (datetime): Время, раньше которого задачу
+            не берут в обработку (откладывается после ошибки).
+        claimed_at (datetime): Время захвата задачи обработчиком.
+    """
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "В очереди"),
+        (PROCESSING, "Обрабатывается"),
+        (DONE, "Готово"),
+        (FAILED, "Ошибка"),
+    )
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name="image_tasks"
+    )
+    status = models.CharField(
+        max_length=MAX_LENGTH_STATUS, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "задача обработки изображения"
+        verbose_name_plural = "Задачи обработки изображений"
+        indexes = [
+            models.Index(
+                fields=["status", "available_at"],
+                name="image_task_status_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id}: {self.status}"
+
+
 class IngredientRecipe(models.Model):
     """
     Модель связи ингредиента и рецепта.
@@ -189,6 +394,7 @@ class Favorite(models.Model):
     Атрибуты:
         user (User): Пользователь, добавивший в избранное.
         recipe (Recipe): Рецепт, добавленный в избранное.
+        created_at (datetime): Дата добавления.
     """
 
     user = models.ForeignKey(
@@ -197,6 +403,9 @@ class Favorite(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE, related_name="favorites_recipe"
     )
+    created_at = models.DateTimeField(
+        "Дата добавления", default=timezone.now, db_index=True
+    )
 
     class Meta:
         verbose_name = "Избранное"
@@ -219,6 +428,7 @@ class Cart(models.Model):
     Атрибуты:
         user (User): Пользователь, добавивший в корзину.
         recipe (Recipe): Рецепт, добавленный в корзину.
+        created_at (datetime): Дата добавления.
     """
 
     user = models.ForeignKey(
@@ -227,6 +437,9 @@ class Cart(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE, related_name="cart_recipe"
     )
+    created_at = models.DateTimeField(
+        "Дата добавления", default=timezone.now, db_index=True
+    )
 
     class Meta:
         verbose_name = "Корзина"
@@ -244,6 +457,55 @@ class Cart(models.Model):
         )
 
 
+class RecipeScore(models.Model):
+    """
+    Материализованные оценки рецепта для сортировки ленты.
+
+    Таблица пересчитывается командой update_recipe_scores.
+
+    Атрибуты:
+        recipe (Recipe): Рецепт.
+        popularity (int): Сколько раз рецепт добавлен в избранное
+            и в список покупок.
+        trending (float): Сумма добавлений за последние дни
+            с экспоненциальным затуханием по давности.
+        updated_at (datetime): Время пересчета.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="score",
+    )
+    popularity = models.PositiveIntegerField(default=0)
+    trending = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "оценка рецепта"
+        verbose_name_plural = "Оценки рецептов"
+        indexes = [
+            models.Index(
+                fields=["-popularity"], name="recipe_score_popularity_idx"
+            ),
+            models.Index(
+                fields=["-trending"], name="recipe_score_trending_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id}: {self.popularity}, {self.trending:.2f}"
+
+
+class SubscriptionQuerySet(models.QuerySet):
+    """Набор запросов для подписок."""
+
+    def with_authors(self):
+        """Подгружает авторов вместе со счетчиком их рецептов."""
+        return self.select_related("author")
+
+
 class Subscription(models.Model):
     """
     Модель подписки.
@@ -266,6 +528,8 @@ class Subscription(models.Model):
         verbose_name="Автор",
     )
 
+    objects = SubscriptionQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
@@ -0,0 +1,57 @@
+"""Полнотекстовый поиск рецептов средствами PostgreSQL."""
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import connections, models
+
+SEARCH_CONFIG = "russian"
+
+
+class SearchVectorIndex(GinIndex):
+    """
+    GIN-индекс по поисковому вектору.
+
+    На других СУБД (SQLite в локальных тестах) создается обычный индекс,
+    чтобы миграции применялись без ошибок.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return models.Index.create_sql(
+                self, model, schema_editor, using=using, **kwargs
+            )
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+
+def supports_full_text(queryset):
+    """Поддерживает ли база queryset полнотекстовый поиск PostgreSQL."""
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def unicode_lower(value):
+    return None if value is None else str(value).lower()
+
+
+def register_sqlite_functions(connection):
+    """
+    Заменяет встроенную в SQLite функцию LOWER, которая меняет регистр
+    только латиницы, на str.lower, чтобы поиск без PostgreSQL
+    не зависел от регистра кириллицы.
+    """
+    if connection.vendor == "sqlite":
+        connection.connection.create_function(
+            "LOWER", 1, unicode_lower, deterministic=True
+        )
+
+
+def recipe_search_vector():
+    """Поисковый вектор рецепта: название весомее описания."""
+    return SearchVector(
+        "name", weight="A", config=SEARCH_CONFIG
+    ) + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+
+
+def update_search_vector(queryset):
+    """Пересчитывает поисковый вектор рецептов из queryset."""
+    if not supports_full_text(queryset):
+        return 0
+    return queryset.update(search_vector=recipe_search_vector())
@@ -0,0 +1,139 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from .models import (
+    Cart, Favorite, IngredientRecipe, Recipe, Tag, User, tag_bits
+)
+from .search import register_sqlite_functions, update_search_vector
+
+# Рецепты, строку которых вызывающий код сохранит сам (см. defer_touch).
+deferred_recipes = ContextVar("deferred_recipes", default=frozenset())
+
+
+@contextmanager
+def defer_touch(recipe):
+    """
+    Внутри блока изменения тегов и ингредиентов рецепта не обновляют
+    его строку в базе, а маска тегов меняется только в памяти.
+    Вызывающий код сам сохраняет рецепт после блока.
+    """
+    token = deferred_recipes.set(deferred_recipes.get() | {recipe.pk})
+    try:
+        yield
+    finally:
+        deferred_recipes.reset(token)
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно изменяет счетчик field объекта модели на delta."""
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gt": 0})
+    queryset.update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "favorites_count", 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, "favorites_count", -1)
+
+
+@receiver(post_save, sender=Cart)
+def cart_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, "cart_count", 1)
+
+
+@receiver(post_delete, sender=Cart)
+def cart_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, "cart_count", -1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, "recipes_count", 1)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_text_changed(sender, instance, update_fields, **kwargs):
+    if update_fields is None or {"name", "text"} & set(update_fields):
+        update_search_vector(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, "recipes_count", -1)
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    if instance.recipe_id not in deferred_recipes.get():
+        Recipe.objects.filter(pk=instance.recipe_id).touch()
+
+
+def changed_mask(action, bits):
+    """Новое значение tags_mask после добавления или удаления bits."""
+    if action == "post_add":
+        return F("tags_mask").bitor(bits)
+    return F("tags_mask").bitand(~bits)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    """
+    Обновляет время изменения и маску тегов рецептов. У рецепта,
+    чьи теги меняются, маска меняется и в памяти, чтобы следующий
+    save() не записал старое значение.
+    """
+    if not reverse:
+        deferred = instance.pk in deferred_recipes.get()
+        if action == "post_clear":
+            instance.tags_mask = 0
+            if not deferred:
+                Recipe.objects.filter(pk=instance.pk).touch(tags_mask=0)
+        elif action in ("post_add", "post_remove"):
+            bits = tag_bits(pk_set)
+            if action == "post_add":
+                instance.tags_mask |= bits
+            else:
+                instance.tags_mask &= ~bits
+            if not deferred:
+                Recipe.objects.filter(pk=instance.pk).touch(
+                    tags_mask=changed_mask(action, bits)
+                )
+    elif action in ("post_add", "post_remove"):
+        Recipe.objects.filter(pk__in=pk_set).touch(
+            tags_mask=changed_mask(action, tag_bits([instance.pk]))
+        )
+    elif action == "pre_clear":
+        instance.recipe_set.touch(
+            tags_mask=changed_mask("post_remove", tag_bits([instance.pk]))
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    """Связи удаляемого тега удаляются каскадом без m2m_changed."""
+    instance.recipe_set.touch(
+        tags_mask=changed_mask("post_remove", tag_bits([instance.pk]))
+    )
+
+
+@receiver(connection_created)
+def add_database_functions(sender, connection, **kwargs):
+    """Подменяет функции SQLite, не учитывающие кириллицу."""
+    register_sqlite_functions(connection)
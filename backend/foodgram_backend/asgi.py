@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings')
+os.environ.setdefault('ROOT_URLCONF', 'foodgram_backend.asgi_urls')
 
 application = get_asgi_application()
@@ -0,0 +1,14 @@
+"""
+Маршруты для запуска под ASGI.
+
+Читающие эндпоинты API обслуживаются асинхронными представлениями
+из api.async_urls, остальные маршруты совпадают с foodgram_backend.urls.
+"""
+from django.urls import include, path
+
+from foodgram_backend.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/", include("api.async_urls")),
+    *sync_urlpatterns,
+]
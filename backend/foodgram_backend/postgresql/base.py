@@ -0,0 +1,281 @@
+"""
+Бэкенд PostgreSQL с пулом соединений процесса.
+
+Django держит отдельное соединение в каждом потоке и при CONN_MAX_AGE=0
+закрывает его в конце запроса, так что каждый запрос заново проходит
+рукопожатие TCP/TLS и аутентификацию. Здесь закрытое соединение
+возвращается в пул процесса и выдается следующему запросу любого
+потока. Число соединений процесса ограничено размером пула, соединения
+старше MAX_LIFETIME пересоздаются, а простоявшие дольше CHECK_INTERVAL
+перед выдачей проверяются запросом SELECT 1. Постоянные соединения
+потока (CONN_MAX_AGE > 0) проверяются в начале каждого запроса.
+
+Параметры задаются ключом POOL в настройках базы; SIZE=0 отключает пул.
+"""
+import os
+import time
+from collections import deque
+from functools import partial
+from threading import BoundedSemaphore, Lock
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base, creation
+from psycopg2 import extensions
+
+POOL_DEFAULTS = {
+    "SIZE": 10,
+    "TIMEOUT": 30,
+    "MAX_LIFETIME": 30 * 60,
+    "CHECK_INTERVAL": 10,
+}
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений psycopg2 с проверкой перед выдачей."""
+
+    def __init__(self, name, size, timeout, max_lifetime, check_interval):
+        self.name = name
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self.slots = BoundedSemaphore(size)
+        self.lock = Lock()
+        # Свободные соединения: (соединение, время создания, возврата).
+        self.idle = deque()
+        self.created_at = {}
+        self.in_use = 0
+        self.acquired = 0
+        self.created = 0
+        self.timeouts = 0
+        self.failed_checks = 0
+        self.wait_time = 0.0
+        self.connect_time = 0.0
+
+    def acquire(self, connect):
+        """
+        Выдает свободное соединение или создает новое функцией connect.
+        Если все соединения заняты, ждет не дольше TIMEOUT секунд.
+        """
+        started = time.monotonic()
+        if not self.slots.acquire(timeout=self.timeout):
+            with self.lock:
+                self.timeouts += 1
+            raise OperationalError(
+                f"Пул соединений {self.name} исчерпан: "
+                f"все {self.size} соединений заняты."
+            )
+        waited = time.monotonic() - started
+        try:
+            connection = self.take_idle() or self.create(connect)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.in_use += 1
+            self.acquired += 1
+            self.wait_time += waited
+        return connection
+
+    def take_idle(self):
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, created_at, returned_at = self.idle.pop()
+            now = time.monotonic()
+            if (
+                connection.closed
+                or now - created_at >= self.max_lifetime
+                or now - returned_at >= self.check_interval
+                and not self.check(connection)
+            ):
+                self.discard(connection)
+                continue
+            return connection
+
+    def create(self, connect):
+        started = time.monotonic()
+        connection = connect()
+        now = time.monotonic()
+        with self.lock:
+            self.created += 1
+            self.connect_time += now - started
+            self.created_at[id(connection)] = now
+        return connection
+
+    def check(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except Exception:
+            with self.lock:
+                self.failed_checks += 1
+            return False
+
+    def discard(self, connection):
+        with self.lock:
+            self.created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def release(self, connection, reuse=True):
+        """
+        Возвращает соединение в пул. Незавершенная транзакция
+        откатывается; сломанное соединение закрывается.
+        """
+        try:
+            status = connection.get_transaction_status()
+            if status in (
+                extensions.TRANSACTION_STATUS_INTRANS,
+                extensions.TRANSACTION_STATUS_INERROR,
+            ):
+                connection.rollback()
+                status = connection.get_transaction_status()
+            reuse = reuse and status == extensions.TRANSACTION_STATUS_IDLE
+        except Exception:
+            reuse = False
+        with self.lock:
+            self.in_use -= 1
+            created_at = self.created_at.get(id(connection))
+            if reuse and created_at is not None:
+                self.idle.append((connection, created_at, time.monotonic()))
+        if not reuse or created_at is None:
+            self.discard(connection)
+        self.slots.release()
+
+    def close_idle(self):
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection, _, _ in idle:
+            self.discard(connection)
+
+    def metrics(self):
+        labels = {"db": self.name}
+        with self.lock:
+            return [
+                ("foodgram_db_pool_size", labels, self.size),
+                ("foodgram_db_pool_connections",
+                 {**labels, "state": "in_use"}, self.in_use),
+                ("foodgram_db_pool_connections",
+                 {**labels, "state": "idle"}, len(self.idle)),
+                ("foodgram_db_pool_acquired_total", labels, self.acquired),
+                ("foodgram_db_pool_wait_seconds_total", labels,
+                 self.wait_time),
+                ("foodgram_db_pool_timeouts_total", labels, self.timeouts),
+                ("foodgram_db_pool_connections_created_total", labels,
+                 self.created),
+                ("foodgram_db_pool_connect_seconds_total", labels,
+                 self.connect_time),
+                ("foodgram_db_pool_failed_checks_total", labels,
+                 self.failed_checks),
+            ]
+
+
+pools = {}
+pools_lock = Lock()
+
+
+def get_pool(conn_params, options):
+    """
+    Пул процесса для параметров подключения. После fork процесс
+    получает новый пул: соединения родителя использовать нельзя.
+    """
+    key = (os.getpid(), tuple(sorted(
+        (name, str(value)) for name, value in conn_params.items()
+    )))
+    with pools_lock:
+        pool = pools.get(key)
+        if pool is None:
+            pool = pools[key] = ConnectionPool(
+                conn_params.get("database", ""),
+                options["SIZE"],
+                options["TIMEOUT"],
+                options["MAX_LIFETIME"],
+                options["CHECK_INTERVAL"],
+            )
+        return pool
+
+
+def close_pools():
+    """Закрывает свободные соединения всех пулов процесса."""
+    pid = os.getpid()
+    with pools_lock:
+        current = [pool for key, pool in pools.items() if key[0] == pid]
+    for pool in current:
+        pool.close_idle()
+
+
+def collect_metrics():
+    """Метрики пулов процесса для METRICS_GAUGES."""
+    pid = os.getpid()
+    with pools_lock:
+        current = [pool for key, pool in pools.items() if key[0] == pid]
+    return [sample for pool in current for sample in pool.metrics()]
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Свободные соединения пула не дают удалить тестовую базу.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, settings_dict, alias="default"):
+        super().__init__(settings_dict, alias)
+        self.pool_options = {
+            **POOL_DEFAULTS, **settings_dict.get("POOL", {})
+        }
+        self.pool = None
+        self.health_check_done = True
+
+    def connect(self):
+        # Новое соединение проверять не нужно.
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Постоянное соединение (CONN_MAX_AGE > 0) проверяется перед
+        # первым использованием в следующем запросе.
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def get_new_connection(self, conn_params):
+        if self.pool_options["SIZE"] <= 0:
+            return super().get_new_connection(conn_params)
+        self.pool = get_pool(conn_params, self.pool_options)
+        connection = self.pool.acquire(
+            partial(super().get_new_connection, conn_params)
+        )
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # Соединение, закрытое внутри atomic, остается у обертки
+            # до следующего connect(), поэтому в пул оно не попадает.
+            self.pool.release(
+                self.connection, reuse=not self.in_atomic_block
+            )
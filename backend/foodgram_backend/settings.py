@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -32,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.PerformanceMiddleware",
+    "api.middleware.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -41,7 +44,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "foodgram_backend.urls"
+# asgi.py подставляет foodgram_backend.asgi_urls с асинхронными эндпоинтами.
+ROOT_URLCONF = os.getenv("ROOT_URLCONF", "foodgram_backend.urls")
 
 TEMPLATES = [
     {
@@ -65,17 +69,111 @@ WSGI_APPLICATION = "foodgram_backend.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
+# foodgram_backend.postgresql - PostgreSQL с пулом соединений процесса.
+DB_ENGINE = os.getenv("DB_ENGINE", "foodgram_backend.postgresql")
+
+if DB_ENGINE == "django.db.backends.sqlite3":
+    # Локальный запуск тестов без PostgreSQL.
+    DATABASES = {
+        "default": {
+            "ENGINE": DB_ENGINE,
+            "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": DB_ENGINE,
+            "NAME": os.getenv("POSTGRES_DB", "django"),
+            "USER": os.getenv("POSTGRES_USER", "django"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", ""),
+            "PORT": os.getenv("DB_PORT", 5432),
+            # С пулом соединения переживают запрос и без CONN_MAX_AGE.
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0)),
+            "POOL": {
+                "SIZE": int(os.getenv("DB_POOL_SIZE", 10)),
+                "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+                "MAX_LIFETIME": int(os.getenv("DB_POOL_MAX_LIFETIME", 30 * 60)),
+                "CHECK_INTERVAL": int(os.getenv("DB_POOL_CHECK_INTERVAL", 10)),
+            },
+        }
+    }
+
+# Реплики для чтения: адреса host[:port] через запятую,
+# для SQLite - пути к файлам копий базы.
+DATABASE_REPLICAS = []
+for number, location in enumerate(
+    filter(None, os.getenv("DB_REPLICAS", "").split(",")), 1
+):
+    replica = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if DB_ENGINE == "django.db.backends.sqlite3":
+        replica["NAME"] = location.strip()
+    else:
+        host, _, port = location.strip().partition(":")
+        replica["HOST"] = host
+        replica["PORT"] = port or replica["PORT"]
+    DATABASES[f"replica_{number}"] = replica
+    DATABASE_REPLICAS.append(f"replica_{number}")
+# Тесты маршрутизации (api/tests/test_replicas.py) включают реплику
+# через override_settings: в тестах она зеркалирует основную базу.
+if not DATABASE_REPLICAS and sys.argv[1:2] == ["test"]:
+    DATABASES["replica_1"] = {
+        **DATABASES["default"], "TEST": {"MIRROR": "default"}
+    }
+
+DATABASE_ROUTERS = ["api.replicas.ReplicaRouter"]
+# Сколько секунд после записи клиент читает из основной базы.
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("POSTGRES_DB", "django"),
-        "USER": os.getenv("POSTGRES_USER", "django"),
-        "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
-        "HOST": os.getenv("DB_HOST", ""),
-        "PORT": os.getenv("DB_PORT", 5432)
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", os.path.join(BASE_DIR, "cache")),
     }
 }
 
+REFERENCE_CACHE_TIMEOUT = int(os.getenv("REFERENCE_CACHE_TIMEOUT", 24 * 60 * 60))
+REFERENCE_CACHE_MAX_AGE = int(os.getenv("REFERENCE_CACHE_MAX_AGE", 60))
+RECIPE_CACHE_TIMEOUT = int(os.getenv("RECIPE_CACHE_TIMEOUT", 24 * 60 * 60))
+
+# Быстрые функции представления вместо полей DRF на читающих эндпоинтах.
+FAST_SERIALIZERS = os.getenv("FAST_SERIALIZERS", "").lower() == "true"
+
+# Алиас кеша и время жизни множеств избранного и корзины пользователей.
+MEMBERSHIP_CACHE = os.getenv("MEMBERSHIP_CACHE", "default")
+MEMBERSHIP_CACHE_TIMEOUT = int(os.getenv("MEMBERSHIP_CACHE_TIMEOUT", 60 * 60))
+
+# Кеш токенов аутентификации: общий кеш TOKEN_CACHE (алиас из CACHES,
+# пустое значение выключает) хранит по хешу токена только id
+# пользователя, LRU в памяти процесса - готовых пользователей.
+# Локальный уровень по умолчанию выключен (TOKEN_CACHE_LOCAL_TTL=0):
+# удаление токена сбрасывает его только в текущем процессе, и другие
+# процессы gunicorn принимали бы токен до истечения TTL. Включать его
+# стоит только при одном процессе.
+TOKEN_CACHE = os.getenv("TOKEN_CACHE", "default") or None
+TOKEN_CACHE_TIMEOUT = int(os.getenv("TOKEN_CACHE_TIMEOUT", 5 * 60))
+TOKEN_CACHE_LOCAL_SIZE = int(os.getenv("TOKEN_CACHE_LOCAL_SIZE", 10000))
+TOKEN_CACHE_LOCAL_TTL = int(os.getenv("TOKEN_CACHE_LOCAL_TTL", 0))
+
+
+# Метрики производительности: заголовок Server-Timing, лог запросов
+# дольше SLOW_REQUEST_MS (0 - выключен) и адреса, с которых доступен
+# /api/metrics/.
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "true").lower() == "true"
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 0))
+METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1").split(",")
+# За nginx REMOTE_ADDR всегда адрес nginx. Ключ request.META с адресом
+# клиента, например HTTP_X_REAL_IP; задавайте, только если прокси
+# перезаписывает этот заголовок и backend недоступен в обход прокси.
+METRICS_CLIENT_IP_HEADER = os.getenv("METRICS_CLIENT_IP_HEADER", "")
+# Функции, возвращающие дополнительные метрики /api/metrics/
+# списком (имя, метки, значение).
+METRICS_GAUGES = ["foodgram_backend.postgresql.base.collect_metrics"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -122,6 +220,14 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 CSV_FILES_DIR = os.path.join(BASE_DIR, "data")
 
+# Обработка изображений рецептов: "db" - очередь в базе, которую
+# разбирает команда process_image_tasks; "thread" - пул потоков процесса.
+IMAGE_PIPELINE_BACKEND = os.getenv("IMAGE_PIPELINE_BACKEND", "db")
+IMAGE_PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", 2))
+# Задача, захваченная обработчиком дольше этого времени (секунды),
+# считается брошенной (обработчик упал) и возвращается в очередь.
+IMAGE_TASK_CLAIM_TIMEOUT = int(os.getenv("IMAGE_TASK_CLAIM_TIMEOUT", 600))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -134,11 +240,15 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": (
         "django_filters.rest_framework.DjangoFilterBackend",
     ),
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "api.paginations.PageLimitPagination",
     "PAGE_SIZE": 6,
     "SEARCH_PARAM": "name",